@@ -468,7 +468,7 @@ def main() -> None:
         # Try to log the error to file
         try:
             log_file = config.get('log_file', DEFAULT_LOG_FILE)
-            log_exception_to_file(error_details, log_file)
+            log_exception_to_file(error_details, log_file, flush=True)
         except Exception as log_exc:
             logger.error(f"Failed to write to error log: {log_exc}")
         
@@ -38,6 +38,12 @@ class ETLConstants:
     #: Default number of rows to insert per batch when doing bulk inserts
     DEFAULT_BULK_INSERT_BATCH_SIZE = 100
 
+    #: Maximum number of statements sent to the server in one round trip
+    STATEMENT_BATCH_SIZE = 1000
+
+    #: Rows fetched per round trip when streaming step results to a consumer
+    FETCH_CHUNK_SIZE = 10000
+
     #: Maximum number of retry attempts for transient failures
     MAX_RETRY_ATTEMPTS = 3
 
@@ -72,6 +78,9 @@ class Settings(BaseSettings):
     db_pool_size: int = Field(5, env="DB_POOL_SIZE")
     db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
     db_pool_timeout: int = Field(30, env="DB_POOL_TIMEOUT")
+    #: Seconds after which pooled connections are replaced so the server's
+    #: idle timeout never hands out a dead connection; ``-1`` disables it.
+    db_pool_recycle: int = Field(3600, env="DB_POOL_RECYCLE")
 
     @validator("mssql_target_conn_str")
     def _require_target_conn_str(cls, v: SecretStr) -> SecretStr:
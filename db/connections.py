@@ -42,8 +42,12 @@ def build_mysql_url(
     )
 
 
-def get_engine(url: URL | str) -> Engine:
-    """Return (and cache) a SQLAlchemy engine for ``url``."""
+def get_engine(url: URL | str, **engine_kwargs: Any) -> Engine:
+    """Return (and cache) a SQLAlchemy engine for ``url``.
+
+    ``engine_kwargs`` are dialect-specific options passed to
+    :func:`sqlalchemy.create_engine` when the engine is first created.
+    """
     key = str(url)
     engine = _engines.get(key)
     if engine is None:
@@ -52,20 +56,26 @@ def get_engine(url: URL | str) -> Engine:
             pool_size=settings.db_pool_size,
             max_overflow=settings.db_max_overflow,
             pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
             pool_pre_ping=True,
+            **engine_kwargs,
         )
         _engines[key] = engine
     return engine
 
 
-def get_connection(url: URL | str) -> Connection:
+def get_connection(url: URL | str, **engine_kwargs: Any) -> Connection:
     """Return a pooled connection for ``url``."""
-    return get_engine(url).connect()
+    return get_engine(url, **engine_kwargs).connect()
 
 
 def get_mssql_connection(conn_str: str) -> Connection:
-    """Return a connection using an ODBC connection string."""
-    return get_connection(build_mssql_url(conn_str))
+    """Return a connection using an ODBC connection string.
+
+    The pyodbc dialect's ``fast_executemany`` is enabled so SQLAlchemy
+    ``executemany`` calls send parameter arrays in one round trip.
+    """
+    return get_connection(build_mssql_url(conn_str), fast_executemany=True)
 
 
 def get_source_connection() -> Connection:
@@ -1,17 +1,27 @@
 from __future__ import annotations
 import sqlalchemy
-from typing import Any, Optional
+from contextlib import closing
+from typing import Any, Optional, Sequence
 
 VERSION_TABLE = "MigrationHistory"
 
+#: Names per bulk query; keeps below SQL Server's 1000-row VALUES and
+#: 2100-parameter limits.
+_BULK_BATCH_SIZE = 1000
+
 
 def _execute(
     conn: Any,
     sql: str,
     params: Optional[tuple[Any, ...]] = None,
     fetch: bool = False,
+    commit: bool = True,
 ) -> Any:
-    """Execute SQL using the provided connection."""
+    """Execute SQL using the provided connection.
+
+    DB-API connections are committed afterwards unless ``commit`` is false,
+    which leaves the statement in the caller's open transaction.
+    """
     # SQLAlchemy connection
     if hasattr(conn, "execute") and not hasattr(conn, "cursor"):
         if params:
@@ -44,9 +54,10 @@ def _execute(
             except Exception:
                 return None
         return None
-    # DB-API connection remains unchanged
+    # DB-API connection; the cursor is only closed, since pyodbc's cursor
+    # context manager commits on exit even when ``commit`` is false
     else:
-        with conn.cursor() as cur:
+        with closing(conn.cursor()) as cur:
             if params:
                 cur.execute(sql, params)
             else:
@@ -57,7 +68,8 @@ def _execute(
                     result = cur.fetchall()
                 except Exception:
                     result = None
-            conn.commit()
+            if commit:
+                conn.commit()
             return result
 
 
@@ -140,4 +152,86 @@ def record_migration(conn: Any, migration_name: str) -> None:
     else:
         # For DB-API connections
         _execute(conn, sql, (migration_name,))
-        # The _execute function already commits for DB-API connections
\ No newline at end of file
+        # The _execute function already commits for DB-API connections
+
+def _commit_sqlalchemy(conn: Any) -> None:
+    """Commit ``conn`` if it is a SQLAlchemy connection (DB-API ones already are)."""
+    if hasattr(conn, "execute") and not hasattr(conn, "cursor"):
+        if hasattr(conn, "commit") and callable(conn.commit):
+            conn.commit()
+
+
+def check_and_claim_migration(
+    conn: Any, migration_name: str, commit: bool = True
+) -> bool:
+    """Record ``migration_name`` as applied unless it already is.
+
+    A single ``MERGE`` both checks and inserts, so concurrent workers cannot
+    claim the same migration twice.  Returns ``True`` if this call claimed it
+    and ``False`` if it was already applied.
+
+    With ``commit=False`` the record joins the caller's open transaction, so
+    it is only kept if the migration's own work commits with it; the
+    ``HOLDLOCK`` makes a concurrent claim wait until that transaction ends.
+    """
+    sql = (
+        f"MERGE dbo.{VERSION_TABLE} WITH (HOLDLOCK) AS t "
+        "USING (VALUES (?)) AS s(script_name) ON t.script_name = s.script_name "
+        "WHEN NOT MATCHED THEN INSERT (script_name) VALUES (s.script_name) "
+        "OUTPUT $action;"
+    )
+    rows = _execute(conn, sql, (migration_name,), fetch=True, commit=commit)
+    if commit:
+        _commit_sqlalchemy(conn)
+    # Rows are only output for the INSERT branch
+    return bool(rows)
+
+
+def load_applied_migrations(conn: Any) -> set[str]:
+    """Return the names of every migration recorded as applied."""
+    sql = f"SELECT script_name FROM dbo.{VERSION_TABLE} WITH (NOLOCK)"
+    rows = _execute(conn, sql, fetch=True) or ()
+    return {row["script_name"] if hasattr(row, "keys") else row[0] for row in rows}
+
+
+def applied_migrations(conn: Any, names: Sequence[str]) -> set[str]:
+    """Return the subset of ``names`` already recorded as applied."""
+    applied: set[str] = set()
+    for start in range(0, len(names), _BULK_BATCH_SIZE):
+        batch = tuple(names[start : start + _BULK_BATCH_SIZE])
+        placeholders = ", ".join(["?"] * len(batch))
+        sql = (
+            f"SELECT script_name FROM dbo.{VERSION_TABLE} WITH (NOLOCK) "
+            f"WHERE script_name IN ({placeholders})"
+        )
+        for row in _execute(conn, sql, batch, fetch=True) or ():
+            applied.add(row["script_name"] if hasattr(row, "keys") else row[0])
+    return applied
+
+
+def record_migrations(
+    conn: Any, names: Sequence[str], commit: bool = True
+) -> set[str]:
+    """Record every name in ``names`` as applied unless it already is.
+
+    Each batch is one multi-row ``MERGE WITH (HOLDLOCK)`` like
+    :func:`check_and_claim_migration`, so concurrent runs cannot record the
+    same name twice.  Returns the names this call inserted; any other name
+    was already recorded.  ``commit`` behaves as for
+    :func:`check_and_claim_migration`.
+    """
+    inserted: set[str] = set()
+    for start in range(0, len(names), _BULK_BATCH_SIZE):
+        batch = tuple(names[start : start + _BULK_BATCH_SIZE])
+        values = ", ".join(["(?)"] * len(batch))
+        sql = (
+            f"MERGE dbo.{VERSION_TABLE} WITH (HOLDLOCK) AS t "
+            f"USING (VALUES {values}) AS s(script_name) ON t.script_name = s.script_name "
+            "WHEN NOT MATCHED THEN INSERT (script_name) VALUES (s.script_name) "
+            "OUTPUT inserted.script_name;"
+        )
+        for row in _execute(conn, sql, batch, fetch=True, commit=commit) or ():
+            inserted.add(row["script_name"] if hasattr(row, "keys") else row[0])
+    if commit:
+        _commit_sqlalchemy(conn)
+    return inserted
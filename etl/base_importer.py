@@ -849,7 +849,7 @@ class BaseDBImporter:
             error_details = traceback.format_exc()
             try:
                 log_file = self.config.get('log_file', self.DEFAULT_LOG_FILE)
-                log_exception_to_file(error_details, log_file)
+                log_exception_to_file(error_details, log_file, flush=True)
             except Exception as log_exc:
                 logger.error(f"Failed to write to error log: {log_exc}")
             try:
@@ -868,7 +868,7 @@ class BaseDBImporter:
             # Try to log the error to file
             try:
                 log_file = self.config.get('log_file', self.DEFAULT_LOG_FILE)
-                log_exception_to_file(error_details, log_file)
+                log_exception_to_file(error_details, log_file, flush=True)
             except Exception as log_exc:
                 logger.error(f"Failed to write to error log: {log_exc}")
             
@@ -11,17 +11,16 @@ from __future__ import annotations
 import logging
 import os
 import json
-import re
 import unicodedata
 from typing import Any, Dict, Generator, Iterable, Iterator, Optional, Tuple, TypeVar
 
 from tqdm import tqdm
 from config import ETLConstants
+# Canonical identifier check, re-exported for the importer modules
+from utils.sql_security import validate_sql_identifier
 
 T = TypeVar("T")
 
-_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
-
 logger = logging.getLogger(__name__)
 
 
@@ -121,28 +120,3 @@ def safe_tqdm(iterable: Iterable[T], **kwargs: Any) -> Iterator[T]:
         print(f"Progress bar disabled: {kwargs.get('desc', 'Processing')}")
         for item in iterable:
             yield item
-
-
-def validate_sql_identifier(identifier: str) -> str:
-    """Validate a string for use as a SQL identifier.
-
-    Only allows alphanumeric characters and underscores and must not start with a digit.
-    Validation mirrors the guidelines outlined under ``Security Considerations``
-    in ``README.md``.
-
-    Args:
-        identifier: The identifier to validate.
-
-    Returns:
-        The original identifier if valid.
-
-    Raises:
-        ValueError: If the identifier is invalid.
-    """
-    if not isinstance(identifier, str):
-        raise ValueError("Identifier must be a string")
-
-    if not _IDENTIFIER_RE.match(identifier):
-        raise ValueError(f"Invalid SQL identifier: {identifier}")
-
-    return identifier
@@ -18,6 +18,19 @@ SCRIPTS = [
 ]
 
 
+def _restore_env(snapshot: dict) -> None:
+    """Restore environment variables captured in ``snapshot``.
+
+    Keys mapped to ``None`` were unset when the snapshot was taken and are
+    removed again.
+    """
+    for key, value in snapshot.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
 def run_sequential_etl(env: dict) -> None:
     """Run the ETL modules sequentially in-process."""
     from importlib import import_module
@@ -29,7 +42,7 @@ def run_sequential_etl(env: dict) -> None:
         "04_LOBColumns",
     ]
 
-    old_environ = os.environ.copy()
+    snapshot = {key: os.environ.get(key) for key in env}
     os.environ.update(env)
 
     try:
@@ -40,8 +53,7 @@ def run_sequential_etl(env: dict) -> None:
                 logger.info("Stopped after %s", module_name)
                 break
     finally:
-        os.environ.clear()
-        os.environ.update(old_environ)
+        _restore_env(snapshot)
 
 
 class ScriptRunner(threading.Thread):
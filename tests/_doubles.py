@@ -0,0 +1,105 @@
+"""Shared test doubles for database connections, cursors and engines."""
+
+import collections
+import itertools
+import sys
+
+
+class DummyCursor:
+    description = [('col',)]
+
+    def __init__(self, fail=False, fail_sql=None, conn=None):
+        self.fail = fail
+        self.fail_sql = fail_sql
+        self.conn = conn
+        self._deferred = None
+    def execute(self, sql, params=None):
+        self._deferred = None
+        if sql.startswith('SET LOCK_TIMEOUT') or sql.startswith('SET NOCOUNT'):
+            return
+        error = sys.modules["pyodbc"].Error(self.conn.error if self.conn else "boom")
+        if self.fail or (self.conn and self.conn.fail_times > 0):
+            if self.conn and self.conn.fail_times > 0:
+                self.conn.fail_times -= 1
+            raise error
+        parts = [part.strip() for part in sql.split(';')]
+        if self.fail_sql and self.fail_sql in parts:
+            if parts[0] == self.fail_sql:
+                raise error
+            # Like pyodbc, errors from later statements in a batch only
+            # surface once their result set is reached
+            self._deferred = error
+    def nextset(self):
+        if self._deferred is not None:
+            error, self._deferred = self._deferred, None
+            raise error
+        return False
+    def fetchall(self):
+        return [('row',)]
+    def close(self):
+        pass
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        # pyodbc commits when a cursor's ``with`` block exits cleanly
+        if exc_type is None and self.conn is not None and not self.conn.autocommit:
+            self.conn.commit()
+
+
+class DummyConn:
+    def __init__(self, fail=False, fail_sql=None, fail_times=0, error="boom"):
+        self.fail = fail
+        self.fail_sql = fail_sql
+        self.fail_times = fail_times
+        self.error = error
+        self.autocommit = True
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return DummyCursor(self.fail, self.fail_sql, conn=self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class DummyEngine:
+    def __init__(self):
+        self.url = None
+    def connect(self):
+        return DummyConn()
+
+
+class DummySelectCursor:
+    def __init__(self, rows):
+        self._it = iter(rows)
+        self.description = [("SchemaName",), ("TableName",), ("ColumnName",), ("DataType",), ("CurrentLength",), ("RowCnt",)]
+
+    def fetchmany(self, size):
+        return list(itertools.islice(self._it, size))
+
+
+class DummyUpdateCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.executed = collections.deque()
+        self.fast_executemany = False
+
+    def executemany(self, sql, params):
+        self.executed.extend(params)
+
+    def execute(self, sql, params=None):
+        if params:
+            self.executed.append(params)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
@@ -1,100 +1,297 @@
+import functools
+import importlib.abc
+import importlib.util
+import os
 import sys
 import types
+from pathlib import Path
 
-# Install lightweight stand-in modules before tests import application code.
-
-def _install_stubs():
-    modules = {}
-    if "tqdm" not in sys.modules:
-        dummy = types.ModuleType("tqdm")
-        dummy.tqdm = lambda it, **kw: it
-        modules["tqdm"] = dummy
-    if "dotenv" not in sys.modules:
-        mod = types.ModuleType("dotenv")
-        mod.load_dotenv = lambda *a, **k: None
-        modules["dotenv"] = mod
-    if "sqlalchemy" not in sys.modules:
-        sa_mod = types.ModuleType("sqlalchemy")
-        sa_mod.create_engine = lambda *a, **k: None
-        sa_mod.MetaData = lambda *a, **k: None
-        pool_mod = types.ModuleType("pool")
-        pool_mod.NullPool = object
-        sa_mod.pool = pool_mod
-        engine_mod = types.ModuleType("engine")
-        engine_mod.Engine = object
-        engine_mod.Connection = object
-        engine_mod.URL = types.SimpleNamespace(create=lambda *a, **k: None)
-        sa_mod.engine = engine_mod
-        exc_mod = types.ModuleType("exc")
-        exc_mod.SQLAlchemyError = Exception
-        modules.update({
-            "sqlalchemy": sa_mod,
-            "sqlalchemy.pool": pool_mod,
-            "sqlalchemy.engine": engine_mod,
-            "sqlalchemy.types": types.SimpleNamespace(Text=lambda *a, **k: None),
-            "sqlalchemy.exc": exc_mod,
-        })
-    if "pydantic" not in sys.modules:
-        pd_mod = types.ModuleType("pydantic")
-        class _BaseSettings:
-            def __init__(self, **values):
-                for k, v in values.items():
-                    setattr(self, k, v)
-        pd_mod.BaseSettings = _BaseSettings
-        pd_mod.DirectoryPath = str
-        pd_mod.Field = lambda *a, **k: None
-        class _SecretStr(str):
-            def get_secret_value(self):
-                return str(self)
-        pd_mod.SecretStr = _SecretStr
-        pd_mod.validator = lambda *a, **k: (lambda f: f)
-        modules["pydantic"] = pd_mod
-        ps_mod = types.ModuleType("pydantic_settings")
-        ps_mod.BaseSettings = _BaseSettings
-        modules["pydantic_settings"] = ps_mod
-    if "pyodbc" not in sys.modules:
-        class _DummyError(Exception):
+import pytest
+
+# Make the top-level scripts (``run_etl``, ``04_LOBColumns``...) importable by name.
+_REPO_ROOT = str(Path(__file__).resolve().parents[1])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+# Serve lightweight stand-in modules for heavy or platform-specific
+# dependencies.  They are used even when the real package is installed: real
+# pydantic validates settings at import time and pyodbc needs the system ODBC
+# library.  Each stub is only built the first time application code imports
+# it, via ``_StubFinder`` on ``sys.meta_path``.
+
+def _stub_tqdm():
+    mod = types.ModuleType("tqdm")
+
+    class _DummyTqdm:
+        def __init__(self, iterable=None, **kwargs):
+            self.iterable = iterable or []
+        def __iter__(self):
+            return iter(self.iterable)
+        def update(self, n=1):
             pass
-        modules["pyodbc"] = types.SimpleNamespace(Error=_DummyError, connect=lambda *a, **k: None)
-    if "mysql" not in sys.modules:
-        dummy_mysql = types.ModuleType("mysql")
-        dummy_mysql.connector = types.SimpleNamespace(connect=lambda **k: None)
-        modules["mysql"] = dummy_mysql
-        modules["mysql.connector"] = dummy_mysql.connector
-    if "keyring" not in sys.modules:
-        modules["keyring"] = types.ModuleType("keyring")
-    if "pandas" not in sys.modules:
-        modules["pandas"] = types.ModuleType("pandas")
-    if "tkinter" not in sys.modules:
-        tk = types.ModuleType("tkinter")
-        tk.Tk = object
-        tk.Label = object
-        tk.Entry = object
-        tk.Button = object
-        tk.Checkbutton = object
-        tk.Frame = object
-        tk.BooleanVar = object
-        tk.StringVar = object
-        tk.scrolledtext = types.SimpleNamespace(ScrolledText=object)
-        tk.messagebox = types.SimpleNamespace(
-            showerror=lambda *a, **k: None,
-            showinfo=lambda *a, **k: None,
-            askyesno=lambda *a, **k: True,
-        )
-        tk.filedialog = types.SimpleNamespace(askdirectory=lambda *a, **k: "")
-        tk.END = None
-        tk.WORD = None
-        tk.LEFT = None
-        tk.DISABLED = "disabled"
-        modules.update({
-            "tkinter": tk,
-            "tkinter.messagebox": tk.messagebox,
-            "tkinter.scrolledtext": tk.scrolledtext,
-            "tkinter.filedialog": tk.filedialog,
-        })
-    for name, mod in modules.items():
-        sys.modules.setdefault(name, mod)
+        def close(self):
+            pass
+
+    mod.tqdm = lambda iterable=None, **kwargs: _DummyTqdm(iterable)
+    return {"tqdm": mod}
+
+
+def _stub_dotenv():
+    mod = types.ModuleType("dotenv")
+    mod.load_dotenv = lambda *a, **k: None
+    return {"dotenv": mod}
+
+
+def _stub_sqlalchemy():
+    sa_mod = types.ModuleType("sqlalchemy")
+    sa_mod.create_engine = lambda *a, **k: None
+    sa_mod.MetaData = lambda *a, **k: None
+    pool_mod = types.ModuleType("sqlalchemy.pool")
+    pool_mod.NullPool = object
+    sa_mod.pool = pool_mod
+    engine_mod = types.ModuleType("sqlalchemy.engine")
+    engine_mod.Engine = object
+    engine_mod.Connection = object
+    engine_mod.URL = types.SimpleNamespace(create=lambda *a, **k: None)
+    sa_mod.engine = engine_mod
+    exc_mod = types.ModuleType("sqlalchemy.exc")
+    exc_mod.SQLAlchemyError = Exception
+    sa_mod.exc = exc_mod
+    types_mod = types.ModuleType("sqlalchemy.types")
+    types_mod.Text = lambda *a, **k: None
+    sa_mod.types = types_mod
+    return {
+        "sqlalchemy": sa_mod,
+        "sqlalchemy.pool": pool_mod,
+        "sqlalchemy.engine": engine_mod,
+        "sqlalchemy.types": types_mod,
+        "sqlalchemy.exc": exc_mod,
+    }
+
+
+def _stub_pydantic():
+    pd_mod = types.ModuleType("pydantic")
+    class _BaseSettings:
+        def __init__(self, **values):
+            for k, v in values.items():
+                setattr(self, k, v)
+    pd_mod.BaseSettings = _BaseSettings
+    pd_mod.DirectoryPath = str
+    pd_mod.Field = lambda *a, **k: None
+    class _SecretStr(str):
+        __slots__ = ()
+        def get_secret_value(self):
+            return str(self)
+    pd_mod.SecretStr = _SecretStr
+    pd_mod.validator = lambda *a, **k: (lambda f: f)
+    ps_mod = types.ModuleType("pydantic_settings")
+    ps_mod.BaseSettings = _BaseSettings
+    return {"pydantic": pd_mod, "pydantic_settings": ps_mod}
+
+
+def _stub_pyodbc():
+    class _DummyError(Exception):
+        pass
+    mod = types.ModuleType("pyodbc")
+    mod.Error = _DummyError
+    mod.connect = lambda *a, **k: None
+    return {"pyodbc": mod}
+
+
+def _stub_mysql():
+    dummy_mysql = types.ModuleType("mysql")
+    dummy_mysql.connector = types.SimpleNamespace(connect=lambda **k: None)
+    return {"mysql": dummy_mysql, "mysql.connector": dummy_mysql.connector}
+
+
+def _stub_keyring():
+    return {"keyring": types.ModuleType("keyring")}
+
+
+def _stub_pandas():
+    return {"pandas": types.ModuleType("pandas")}
+
+
+def _stub_tkinter():
+    tk = _make_tk_stub()
+    return {
+        "tkinter": tk,
+        "tkinter.messagebox": tk.messagebox,
+        "tkinter.scrolledtext": tk.scrolledtext,
+        "tkinter.filedialog": tk.filedialog,
+    }
+
+
+#: Top-level module name -> builder returning ``{module name: stub}``
+_STUB_BUILDERS = {
+    "tqdm": _stub_tqdm,
+    "dotenv": _stub_dotenv,
+    "sqlalchemy": _stub_sqlalchemy,
+    "pydantic": _stub_pydantic,
+    "pydantic_settings": _stub_pydantic,
+    "pyodbc": _stub_pyodbc,
+    "mysql": _stub_mysql,
+    "keyring": _stub_keyring,
+    "pandas": _stub_pandas,
+    "tkinter": _stub_tkinter,
+}
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Build stub modules on first import instead of at session start."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        top = fullname.partition(".")[0]
+        if top not in _STUB_BUILDERS:
+            return None
+        return importlib.util.spec_from_loader(fullname, self)
+
+    def create_module(self, spec):
+        stubs = _STUB_BUILDERS[spec.name.partition(".")[0]]()
+        # Register sibling stubs (e.g. ``sqlalchemy.engine``) so later
+        # ``from x.y import z`` statements resolve without another lookup.
+        for name, mod in stubs.items():
+            if name != spec.name:
+                sys.modules.setdefault(name, mod)
+        return stubs[spec.name]
+
+    def exec_module(self, module):
+        pass
 
 
 def pytest_configure(config):
-    _install_stubs()
+    sys.meta_path.insert(0, _StubFinder())
+
+
+_IMPORTER_ENV_KEYS = ("MSSQL_TARGET_CONN_STR", "EJ_CSV_DIR", "EJ_LOG_DIR")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _importer_env(tmp_path_factory):
+    """Provide the environment ``BaseDBImporter.validate_environment`` expects."""
+    env_dir = str(tmp_path_factory.mktemp("importer_env"))
+    old = {k: os.environ.get(k) for k in _IMPORTER_ENV_KEYS}
+    os.environ.update({
+        "MSSQL_TARGET_CONN_STR": "Driver=SQLite;Database=:memory:",
+        "EJ_CSV_DIR": env_dir,
+        "EJ_LOG_DIR": env_dir,
+    })
+    yield
+    for key, value in old.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+@functools.lru_cache(maxsize=None)
+def _make_tk_stub():
+    """Return the ``tkinter`` stand-in whose widgets accept the calls ``App`` makes.
+
+    The same object backs the ``tkinter`` import stub and the ``tk_stub``
+    fixture, so modules importing it never need reloading.
+    """
+
+    class DummyWidget:
+        def __init__(self, *a, **kw):
+            pass
+        def grid(self, *a, **kw):
+            pass
+        def pack(self, *a, **kw):
+            pass
+        def config(self, *a, **kw):
+            pass
+        def insert(self, *a, **kw):
+            pass
+        def get(self):
+            return ""
+        def delete(self, *a, **kw):
+            pass
+        def see(self, *a, **kw):
+            pass
+        def grid_rowconfigure(self, *a, **kw):
+            pass
+        def grid_columnconfigure(self, *a, **kw):
+            pass
+
+    class DummyEntry(DummyWidget):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            self._val = ""
+        def insert(self, idx, val):
+            self._val = val
+        def get(self):
+            return self._val
+
+    class DummyVar:
+        def __init__(self, value=None):
+            self._v = value
+        def get(self):
+            return self._v
+        def set(self, val):
+            self._v = val
+
+    class DummyTk(DummyWidget):
+        def title(self, *a, **k):
+            pass
+        def resizable(self, *a, **k):
+            pass
+        def minsize(self, *a, **k):
+            pass
+        def after(self, *a, **k):
+            pass
+
+    class DummyScrolled(DummyWidget):
+        pass
+
+    return types.SimpleNamespace(
+        Tk=DummyTk,
+        Label=DummyWidget,
+        Entry=DummyEntry,
+        Button=DummyWidget,
+        Checkbutton=DummyWidget,
+        Frame=DummyWidget,
+        BooleanVar=DummyVar,
+        StringVar=DummyVar,
+        scrolledtext=types.SimpleNamespace(ScrolledText=DummyScrolled),
+        filedialog=types.SimpleNamespace(askdirectory=lambda: ""),
+        messagebox=types.SimpleNamespace(showerror=lambda *a, **k: None,
+                                         showinfo=lambda *a, **k: None,
+                                         askyesno=lambda *a, **k: True),
+        END=None,
+        WORD=None,
+        LEFT=None,
+        DISABLED="disabled",
+    )
+
+
+@pytest.fixture(scope="session")
+def tk_stub():
+    """Widget-capable ``tkinter`` stand-in, built once per session."""
+    return _make_tk_stub()
+
+
+@pytest.fixture
+def no_migrations_applied(monkeypatch):
+    """Treat every step and script as not yet applied, without a database."""
+    monkeypatch.setattr('utils.etl_helpers.ensure_version_table', lambda c: None)
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', lambda c: set())
+    monkeypatch.setattr('utils.etl_helpers.check_and_claim_migration', lambda c, n, commit=True: True)
+
+
+@pytest.fixture
+def fake_create_engine(monkeypatch):
+    """Route ``sqlalchemy.create_engine`` to a recorder and return its call log."""
+    import db.connections as connections
+    from tests._doubles import DummyEngine
+
+    called = {}
+
+    def _create_engine(url, **kwargs):
+        called['url'] = url
+        called['kwargs'] = kwargs
+        return DummyEngine()
+
+    monkeypatch.setattr(connections.sqlalchemy, 'create_engine', _create_engine, raising=False)
+    monkeypatch.setattr(connections, '_engines', {}, raising=False)
+    return called
@@ -129,6 +129,21 @@ def test_progress_helpers(tmp_path):
     assert not path.exists()
 
 
+def test_progress_tracker_batches_writes(tmp_path):
+    path = tmp_path / "prog.json"
+    tracker = ProgressTracker(str(path), flush_every=3)
+
+    tracker.update("pk_creation", 1)
+    tracker.update("pk_creation", 2)
+    assert not path.exists()
+    tracker.update("pk_creation", 3)
+    assert ProgressTracker(str(path)).get("pk_creation") == 3
+    tracker.update("pk_creation", 4)
+    tracker.flush()
+    assert ProgressTracker(str(path)).get("pk_creation") == 4
+    assert not (tmp_path / "prog.json.tmp").exists()
+
+
 def test_should_process_table_overrides():
     importer = BaseDBImporter()
     importer.config = {
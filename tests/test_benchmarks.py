@@ -1,28 +1,9 @@
-
+import itertools
 import timeit
 import pytest
 from utils.etl_helpers import run_sql_step_with_retry
 
-class DummyCursor:
-    def __init__(self, conn=None):
-        self.conn = conn
-    def execute(self, sql, params=None):
-        if 'SET LOCK_TIMEOUT' in sql:
-            return
-    def fetchall(self):
-        return [('row',)]
-    def __enter__(self):
-        return self
-    def __exit__(self, exc_type, exc, tb):
-        pass
-
-class DummyConn:
-    def cursor(self):
-        return DummyCursor()
-    def commit(self):
-        pass
-    def rollback(self):
-        pass
+from tests._doubles import DummyConn
 
 
 @pytest.fixture
@@ -32,7 +13,10 @@ def benchmark_simple():
     return run
 
 
-def test_run_sql_step_with_retry_benchmark(benchmark_simple):
+def test_run_sql_step_with_retry_benchmark(benchmark_simple, no_migrations_applied):
     conn = DummyConn()
-    duration = benchmark_simple(lambda: run_sql_step_with_retry(conn, 'bench', 'SELECT 1'))
+    # A fresh name per run so every iteration executes instead of being skipped
+    names = (f'bench_{i}' for i in itertools.count())
+    duration = benchmark_simple(lambda: run_sql_step_with_retry(conn, next(names), 'SELECT 1'))
+    assert conn.commits == 1000
     assert duration >= 0
@@ -1,56 +1,31 @@
+import asyncio
+import itertools
 import pytest
 import sys
+import types
 
 from config import ETLConstants
+from utils import etl_helpers
 from utils.etl_helpers import (
+    _split_batches,
+    execute_prepared,
+    log_exception_to_file,
     run_sql_step,
     run_sql_script,
+    run_sql_step_async,
+    run_sql_step_pooled,
+    run_sql_steps,
     run_sql_step_with_retry,
     load_sql,
     SQLExecutionError,
+    STEP_SKIPPED,
     transaction_scope,
 )
 
-class DummyCursor:
-    def __init__(self, fail=False, fail_sql=None, conn=None):
-        self.fail = fail
-        self.fail_sql = fail_sql
-        self.conn = conn
-    def execute(self, sql, params=None):
-        if 'SET LOCK_TIMEOUT' in sql:
-            return
-        if (
-            self.fail
-            or (self.fail_sql and sql.strip() == self.fail_sql)
-            or (self.conn and self.conn.fail_times > 0)
-        ):
-            if self.conn and self.conn.fail_times > 0:
-                self.conn.fail_times -= 1
-            raise sys.modules["pyodbc"].Error("boom")
-    def fetchall(self):
-        return [('row',)]
-    def __enter__(self):
-        return self
-    def __exit__(self, exc_type, exc, tb):
-        pass
-
-class DummyConn:
-    def __init__(self, fail=False, fail_sql=None, fail_times=0):
-        self.fail = fail
-        self.fail_sql = fail_sql
-        self.fail_times = fail_times
-        self.autocommit = True
-        self.commits = 0
-        self.rollbacks = 0
+from tests._doubles import DummyConn, DummyCursor, DummyUpdateCursor
 
-    def cursor(self):
-        return DummyCursor(self.fail, self.fail_sql, conn=self)
 
-    def commit(self):
-        self.commits += 1
-
-    def rollback(self):
-        self.rollbacks += 1
+pytestmark = pytest.mark.usefixtures("no_migrations_applied")
 
 
 class DummyConnNoAutocommit(DummyConn):
@@ -67,36 +42,465 @@ def test_run_sql_step_success():
     assert result == [('row',)]
 
 
-def test_run_sql_step_failure():
+def test_lock_timeout_cached_for_connections_without_weakrefs():
+    executed = []
+
+    class SlotConn:
+        __slots__ = ()  # like pyodbc.Connection, cannot be weakly referenced
+
+    cursor = types.SimpleNamespace(execute=executed.append)
+    conn = SlotConn()
+    etl_helpers._set_lock_timeout(conn, cursor, 5)
+    etl_helpers._set_lock_timeout(conn, cursor, 5)
+    assert executed == ['SET LOCK_TIMEOUT 5000']
+
+
+def test_applied_cache_supports_connections_without_weakrefs(monkeypatch):
+    loads = []
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', lambda c: loads.append(c) or set())
+
+    class SlotConn:
+        __slots__ = ()  # like pyodbc.Connection, cannot be weakly referenced
+
+    conn, other = SlotConn(), SlotConn()
+    assert etl_helpers._applied_cache(conn) is etl_helpers._applied_cache(conn)
+    etl_helpers._applied_cache(other)
+    assert loads == [conn, other]
+
+
+def test_lock_timeout_sent_once_per_connection():
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            executed.append(sql)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(conn=self)
+
+    conn = TrackConn()
+    run_sql_step(conn, 'a', 'SELECT 1')
+    run_sql_step(conn, 'b', 'SELECT 2')
+    run_sql_step(conn, 'c', 'SELECT 3', timeout=5)
+    assert executed == [
+        'SET LOCK_TIMEOUT 300000', 'SELECT 1', 'SELECT 2', 'SET LOCK_TIMEOUT 5000', 'SELECT 3'
+    ]
+
+
+def test_run_sql_step_skips_fetch_without_result_set():
+    class DDLCursor(DummyCursor):
+        description = None
+        rowcount = 3
+
+        def fetchall(self):
+            raise AssertionError('fetchall called for a statement without rows')
+
+    class DDLConn(DummyConn):
+        def cursor(self):
+            return DDLCursor(conn=self)
+
+    assert run_sql_step(DDLConn(), 'ddl', 'UPDATE t SET c = 1') is None
+
+
+def test_run_sql_step_streams_rows_to_consumer(monkeypatch):
+    monkeypatch.setattr(ETLConstants, 'FETCH_CHUNK_SIZE', 2)
+
+    class StreamCursor(DummyCursor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._rows = iter([(1,), (2,), (3,)])
+
+        def fetchall(self):
+            raise AssertionError('fetchall called while streaming')
+
+        def fetchmany(self, size):
+            return list(itertools.islice(self._rows, size))
+
+    class StreamConn(DummyConn):
+        def cursor(self):
+            return StreamCursor(conn=self)
+
+    chunks = []
+    assert run_sql_step(StreamConn(), 'big', 'SELECT n FROM t', consume=chunks.append) is None
+    assert chunks == [[(1,), (2,)], [(3,)]]
+
+
+def test_run_sql_step_skips_applied_migration(monkeypatch):
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', lambda c: {'done'})
+    conn = DummyConn(fail=True)
+    assert run_sql_step(conn, 'done', 'SELECT 1') is STEP_SKIPPED
+    assert (conn.commits, conn.rollbacks) == (0, 0)
+
+
+def test_run_sql_step_wraps_migration_bookkeeping_errors(monkeypatch):
+    Error = sys.modules["pyodbc"].Error
+
+    def broken_load(c):
+        raise Error('08S01', 'Communication link failure')
+
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', broken_load)
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_step(DummyConn(), 'step', 'SELECT 1')
+    assert isinstance(exc.value.original_error, Error)
+    assert exc.value.table_name == 'step'
+
+
+def test_run_sql_step_commits_work_with_record():
+    conn = DummyConn()
+    assert run_sql_step(conn, 'step', 'SELECT 1') == [('row',)]
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_step_and_script_work_not_committed_before_record(monkeypatch):
+    commits_at_record = []
+    monkeypatch.setattr(
+        'utils.etl_helpers.check_and_claim_migration',
+        lambda c, n, commit=True: commits_at_record.append(c.commits) or True,
+    )
+    step_conn, script_conn = DummyConn(), DummyConn()
+    run_sql_step(step_conn, 'step', 'SELECT 1')
+    run_sql_script(script_conn, 'script', 'SELECT 1; SELECT 2')
+    assert commits_at_record == [0, 0]
+    assert (step_conn.commits, script_conn.commits) == (1, 1)
+
+
+def test_run_sql_step_rolls_back_when_applied_concurrently(monkeypatch):
+    lookups = []
+
+    def fake_claim(c, name, commit=True):
+        lookups.append((name, commit))
+        return False
+
+    monkeypatch.setattr('utils.etl_helpers.check_and_claim_migration', fake_claim)
+    conn = DummyConn()
+    assert run_sql_step(conn, 'done', 'SELECT 1') is STEP_SKIPPED
+    assert run_sql_step(conn, 'done', 'SELECT 1') is STEP_SKIPPED
+    assert lookups == [('done', False)]
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+
+
+def test_run_sql_step_failure(monkeypatch):
+    claimed = []
+    monkeypatch.setattr(
+        'utils.etl_helpers.check_and_claim_migration',
+        lambda c, n, commit=True: claimed.append(n) or True,
+    )
     conn = DummyConn(fail=True)
     with pytest.raises(SQLExecutionError) as exc:
         run_sql_step(conn, 'table', 'SELECT 1')
     assert exc.value.sql == 'SELECT 1'
     assert exc.value.table_name == 'table'
+    assert claimed == []
+    assert conn.rollbacks == 1
+
+
+def test_run_sql_steps_filters_applied_and_records_once(monkeypatch):
+    recorded = []
+
+    def fake_record(c, names, commit=True):
+        recorded.append((names, commit, c.commits))
+        return set(names)
+
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', lambda c: {'a'})
+    monkeypatch.setattr('utils.etl_helpers.record_migrations', fake_record)
+    conn = DummyConn()
+    assert run_sql_steps(conn, [('a', 'SELECT 1'), ('b', 'SELECT 2'), ('c', 'SELECT 3')]) == ['b', 'c']
+    assert recorded == [(['b', 'c'], False, 0)]
+    assert conn.commits == 1
+
+
+def test_run_sql_steps_rolls_back_on_failure(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        'utils.etl_helpers.record_migrations', lambda c, names, commit=True: recorded.append(names)
+    )
+    conn = DummyConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_steps(conn, [('a', 'SELECT 1'), ('b', 'FAIL')])
+    assert exc.value.table_name == 'b'
+    assert recorded == []
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+
+
+def test_run_sql_steps_reruns_pending_steps_after_concurrent_record(monkeypatch):
+    recorded = []
+
+    def fake_record(c, names, commit=True):
+        recorded.append(names)
+        # The first attempt finds 'a' already recorded by another worker
+        return set(names) - {'a'} if len(recorded) == 1 else set(names)
+
+    monkeypatch.setattr('utils.etl_helpers.record_migrations', fake_record)
+    conn = DummyConn()
+    assert run_sql_steps(conn, [('a', 'SELECT 1'), ('b', 'SELECT 2')]) == ['b']
+    assert recorded == [['a', 'b'], ['b']]
+    assert (conn.commits, conn.rollbacks) == (1, 1)
+
+
+def test_run_sql_step_pooled_uses_checked_out_connection(monkeypatch):
+    conns = []
+
+    class PooledConn(DummyConn):
+        def __enter__(self):
+            conns.append(self)
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            self.closed = True
+
+    monkeypatch.setattr('utils.etl_helpers.get_target_connection', PooledConn)
+    assert run_sql_step_pooled('test', 'SELECT 1') == [('row',)]
+    assert conns and conns[0].closed
+
+
+def test_run_sql_step_async_runs_steps_concurrently(monkeypatch):
+    class PooledConn(DummyConn):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            pass
+
+    monkeypatch.setattr('utils.etl_helpers.get_target_connection', PooledConn)
+
+    async def run_all():
+        return await asyncio.gather(
+            run_sql_step_async('a', 'SELECT 1'), run_sql_step_async('b', 'SELECT 2')
+        )
+
+    assert asyncio.run(run_all()) == [[('row',)], [('row',)]]
 
 
 def test_run_sql_script_failure(monkeypatch):
     sql = 'SELECT 1; FAIL; SELECT 2'
     conn = DummyConn(fail_sql='FAIL')
-    monkeypatch.setattr('utils.etl_helpers.has_migration', lambda c, n: False)
     with pytest.raises(SQLExecutionError) as exc:
         run_sql_script(conn, 'table', sql)
     assert exc.value.sql.strip() == 'FAIL'
     assert exc.value.table_name == 'table'
 
 
+def test_run_sql_script_batches_statements(monkeypatch):
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            if not sql.startswith('SET '):
+                executed.append(sql)
+            super().execute(sql, params)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(self.fail, self.fail_sql, conn=self)
+
+    conn = TrackConn()
+    run_sql_script(conn, 'script', 'SELECT 1; -- note\n; SELECT 2;\nGO\nSELECT 3')
+    assert executed == ['SELECT 1;\nSELECT 2', 'SELECT 3']
+    assert conn.commits == 1
+
+
+def test_run_sql_script_raises_deferred_batch_errors():
+    conn = DummyConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_script(conn, 'script', 'SELECT 1; FAIL; SELECT 2')
+    assert exc.value.sql == 'FAIL'
+    assert conn.rollbacks == 2
+
+
+def test_run_sql_script_sends_ddl_statements_alone():
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            if not sql.startswith('SET '):
+                executed.append(sql)
+            super().execute(sql, params)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(self.fail, self.fail_sql, conn=self)
+
+    run_sql_script(TrackConn(), 'script', 'ALTER TABLE t ADD c INT; UPDATE t SET c = 1')
+    assert executed == ['ALTER TABLE t ADD c INT', 'UPDATE t SET c = 1']
+
+
+def test_run_sql_script_commit_every_groups_round_trips():
+    conn = DummyConn()
+    run_sql_script(conn, 'script', 'SELECT 1\nGO\nSELECT 2\nGO\nSELECT 3', commit_every=2)
+    assert conn.commits == 2
+
+
+def test_run_sql_script_commit_every_keeps_earlier_groups():
+    conn = DummyConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_script(conn, 'script', 'SELECT 1\nGO\nFAIL', commit_every=1)
+    assert exc.value.sql == 'FAIL'
+    assert (conn.commits, conn.rollbacks) == (1, 1)
+
+
+def test_run_sql_script_commit_every_rerun_skips_committed_groups(monkeypatch):
+    recorded = set()
+    monkeypatch.setattr('utils.etl_helpers.load_applied_migrations', lambda c: set(recorded))
+    monkeypatch.setattr(
+        'utils.etl_helpers.check_and_claim_migration',
+        lambda c, n, commit=True: recorded.add(n) or True,
+    )
+    sql = 'SELECT 1\nGO\nSELECT 2\nGO\nFAIL'
+    with pytest.raises(SQLExecutionError):
+        run_sql_script(DummyConn(fail_sql='FAIL'), 'script', sql, commit_every=1)
+    assert recorded == {'script#group-1', 'script#group-2'}
+
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            if not sql.startswith('SET '):
+                executed.append(sql)
+            super().execute(sql, params)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(self.fail, self.fail_sql, conn=self)
+
+    run_sql_script(TrackConn(), 'script', sql.replace('FAIL', 'SELECT 3'), commit_every=1)
+    assert executed == ['SELECT 3']
+    assert 'script' in recorded
+
+
+def test_run_sql_script_single_statement_failure_not_replayed():
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            if not sql.startswith('SET '):
+                executed.append(sql)
+            super().execute(sql, params)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(self.fail, self.fail_sql, conn=self)
+
+    conn = TrackConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_script(conn, 'script', 'SELECT 1 INTO t FROM s; CREATE INDEX ix ON t (a); FAIL')
+    assert exc.value.sql == 'FAIL'
+    assert executed == ['SELECT 1 INTO t FROM s', 'CREATE INDEX ix ON t (a)', 'FAIL']
+    assert conn.rollbacks == 1
+
+
+def test_run_sql_script_replays_only_the_failed_joined_unit():
+    executed = []
+
+    class TrackCursor(DummyCursor):
+        def execute(self, sql, params=None):
+            if not sql.startswith('SET '):
+                executed.append(sql)
+            super().execute(sql, params)
+
+    class TrackConn(DummyConn):
+        def cursor(self):
+            return TrackCursor(self.fail, self.fail_sql, conn=self)
+
+    conn = TrackConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_script(conn, 'script', 'SELECT 1\nGO\nSELECT 2; FAIL; SELECT 3')
+    assert exc.value.sql == 'FAIL'
+    assert executed == [
+        'SELECT 1', 'SELECT 2;\nFAIL;\nSELECT 3', 'SELECT 2', 'FAIL',
+    ]
+    assert (conn.commits, conn.rollbacks) == (0, 2)
+
+
+def test_run_sql_script_explicit_transaction_not_replayed():
+    sql = 'BEGIN TRAN; SELECT 1; FAIL; COMMIT'
+    conn = DummyConn(fail_sql='FAIL')
+    with pytest.raises(SQLExecutionError) as exc:
+        run_sql_script(conn, 'txn', sql)
+    assert exc.value.sql == 'BEGIN TRAN;\nSELECT 1;\nFAIL;\nCOMMIT'
+    assert conn.rollbacks == 0
+
+
+def test_transaction_keywords_in_comments_and_strings_are_ignored():
+    sql = "-- commit later\nSELECT 1; /* ROLLBACK */ INSERT INTO t VALUES ('ROLLBACK')"
+    assert not etl_helpers._has_explicit_transaction(sql)
+    assert etl_helpers._has_explicit_transaction('BEGIN TRAN; SELECT 1; COMMIT')
+
+
+def test_go_separator_matches_case_and_line_endings():
+    sql = 'SELECT 1\r\n go \r\nSELECT 2\nGO\nSELECT goal FROM t'
+    assert _split_batches(sql) == (('SELECT 1',), ('SELECT 2',), ('SELECT goal FROM t',))
+
+
+def test_go_inside_comments_and_strings_does_not_split():
+    sql = "SELECT 'a\nGO\nb';\n/*\nGO\n*/\nSELECT 2"
+    assert _split_batches(sql) == (("SELECT 'a\nGO\nb'", '/*\nGO\n*/\nSELECT 2'),)
+
+
+def test_script_chunks_drop_comment_only_batches():
+    sql = '-- header only\nGO\n/* block */\nGO\nSELECT 1; SELECT 2\nGO\n'
+    assert etl_helpers._script_chunks(sql) == [('SELECT 1', 'SELECT 2')]
+
+
+def test_split_batches_ignores_quoted_and_commented_semicolons():
+    sql = "SELECT ';' AS [a;b]; /* x; y */ ; -- only a comment;\nUPDATE t SET c = 1"
+    assert _split_batches(sql) == (("SELECT ';' AS [a;b]", "-- only a comment;\nUPDATE t SET c = 1"),)
+
+
 def test_run_sql_step_with_retry_success():
     conn = DummyConn()
     result = run_sql_step_with_retry(conn, 'test', 'SELECT 1')
     assert result == [('row',)]
 
 
+def test_run_sql_step_with_retry_runs_once_without_retries():
+    assert run_sql_step_with_retry(DummyConn(), 'test', 'SELECT 1', max_retries=0) == [('row',)]
+
+
 def test_run_sql_step_with_retry_retries(monkeypatch):
-    conn = DummyConn(fail_times=2)
+    sleeps = []
+    monkeypatch.setattr('utils.etl_helpers.time.sleep', sleeps.append)
+    conn = DummyConn(fail_times=2, error='Query timeout expired')
     result = run_sql_step_with_retry(
         conn, 'test', 'SELECT 1', max_retries=ETLConstants.MAX_RETRY_ATTEMPTS
     )
     assert result == [('row',)]
+    assert len(sleeps) == 2
+    assert 0.5 <= sleeps[0] <= 1.5 and 1.0 <= sleeps[1] <= 3.0
+
+
+def test_run_sql_step_with_retry_raises_non_transient(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr('utils.etl_helpers.time.sleep', sleeps.append)
+    conn = DummyConn(fail_times=1, error='Invalid object name')
+    with pytest.raises(SQLExecutionError):
+        run_sql_step_with_retry(conn, 'test', 'SELECT 1', max_retries=3)
+    assert sleeps == []
+
+
+def test_is_transient_prefers_sqlstate():
+    Error = sys.modules["pyodbc"].Error
+    assert etl_helpers._is_transient(Error('40001', '[40001] deadlock victim (1205)'))
+    assert etl_helpers._is_transient(Error('HYT00', '[HYT00] Query timeout expired'))
+    assert not etl_helpers._is_transient(Error('42S02', "Invalid object name 'timeout_log'"))
+    assert etl_helpers._is_transient(Error('Communication link failure'))
+
+
+def test_is_transient_checks_native_error_for_generic_sqlstate():
+    Error = sys.modules["pyodbc"].Error
+    lock_timeout = (
+        '[HY000] [Microsoft][ODBC Driver 17 for SQL Server][SQL Server]'
+        'Lock request time out period exceeded. (1222) (SQLExecDirectW)'
+    )
+    assert etl_helpers._is_transient(Error('HY000', lock_timeout))
+    assert not etl_helpers._is_transient(
+        Error('HY000', '[HY000] Arithmetic overflow. (8115) (SQLExecDirectW)')
+    )
+    duplicate_key = (
+        '[23000] [Microsoft][ODBC Driver 17 for SQL Server][SQL Server]Violation of PRIMARY KEY '
+        'constraint. The duplicate key value is (1205). (2627) (SQLExecDirectW)'
+    )
+    assert not etl_helpers._is_transient(Error('23000', duplicate_key))
 
 
 def test_run_sql_step_with_retry_deadlock(monkeypatch):
@@ -113,6 +517,7 @@ def test_run_sql_step_with_retry_deadlock(monkeypatch):
         return [('row',)]
 
     monkeypatch.setattr('utils.etl_helpers.run_sql_step', fake_step)
+    monkeypatch.setattr('utils.etl_helpers.time.sleep', lambda s: None)
     result = run_sql_step_with_retry(conn, 'dead', 'SELECT 1', max_retries=2)
     assert result == [('row',)]
     assert calls['count'] == 2
@@ -123,6 +528,32 @@ def test_load_sql_valid_path():
     assert 'CREATE TABLE' in sql
 
 
+def test_load_sql_reads_each_file_once():
+    load_sql.cache_clear()
+    first = load_sql('misc/gather_lobs.sql', 'DbA')
+    second = load_sql('misc/gather_lobs.sql', 'DbB')
+    info = etl_helpers._load_sql_cached.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    assert 'DbA' in first and '{{DB_NAME}}' not in first
+    assert second == first.replace('DbA', 'DbB')
+
+
+def test_load_sql_keeps_unknown_placeholders(monkeypatch):
+    monkeypatch.setattr(
+        etl_helpers, '_load_sql_cached',
+        lambda f: tuple(etl_helpers._PLACEHOLDER_RE.split('USE {{DB_NAME}}; SELECT {{OTHER}}')),
+    )
+    assert load_sql('x.sql', 'Db') == 'USE Db; SELECT {{OTHER}}'
+
+
+def test_load_sql_uses_settings_db_name_without_gui(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'run_etl', raising=False)
+    monkeypatch.setattr(etl_helpers.settings, 'mssql_target_db_name', 'SettingsDb')
+    sql = load_sql('misc/gather_lobs.sql')
+    assert 'SettingsDb' in sql
+    assert 'run_etl' not in sys.modules
+
+
 def test_load_sql_path_traversal():
     with pytest.raises(ValueError):
         load_sql('../utils/etl_helpers.py')
@@ -133,6 +564,24 @@ def test_load_sql_invalid_parent_reference():
         load_sql('../etc/passwd')
 
 
+def test_log_exception_to_file_appends_lines(tmp_path):
+    log_file = tmp_path / 'errors.log'
+    log_exception_to_file('first failure', str(log_file))
+    log_exception_to_file('second failure', str(log_file))
+    etl_helpers._stop_exception_listener()
+
+    lines = log_file.read_text(encoding='utf-8').splitlines()
+    assert [line.split('] ', 1)[1] for line in lines] == ['first failure', 'second failure']
+    assert lines[0].startswith('[')
+
+
+def test_log_exception_to_file_flush_writes_before_returning(tmp_path):
+    log_file = tmp_path / 'errors.log'
+    log_exception_to_file('fatal failure', str(log_file), flush=True)
+    assert log_file.read_text(encoding='utf-8').rstrip().endswith('fatal failure')
+    assert etl_helpers._exc_listener is None
+
+
 def test_transaction_scope_commit_and_restore():
     conn = DummyConn()
     assert conn.autocommit is True
@@ -172,3 +621,38 @@ def test_transaction_scope_no_autocommit_attribute_rollback():
     assert not hasattr(conn, 'autocommit')
     assert conn.commits == 0
     assert conn.rollbacks == 1
+
+
+def test_execute_prepared_batches_with_fast_executemany():
+    batches = []
+
+    class BatchCursor(DummyUpdateCursor):
+        def executemany(self, sql, params):
+            batches.append(list(params))
+            super().executemany(sql, params)
+
+    class BatchConn(DummyConn):
+        def cursor(self):
+            self.last_cursor = BatchCursor(self)
+            return self.last_cursor
+
+    conn = BatchConn()
+    rows = ((i,) for i in range(5))
+    assert execute_prepared(conn, 'INSERT INTO t VALUES (?)', rows, batch_size=2) == 5
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert conn.last_cursor.fast_executemany is True
+
+
+def test_execute_prepared_sets_lock_timeout():
+    statements = []
+
+    class TimeoutCursor(DummyUpdateCursor):
+        def execute(self, sql, params=None):
+            statements.append(sql)
+
+    class TimeoutConn(DummyConn):
+        def cursor(self):
+            return TimeoutCursor(self)
+
+    execute_prepared(TimeoutConn(), 'INSERT INTO t VALUES (?)', [(1,)], timeout=5)
+    assert statements == ['SET LOCK_TIMEOUT 5000']
@@ -1,15 +1,26 @@
 """Basic end-to-end integration test for a database importer."""
 
 import sqlite3
-import argparse
 import sys
 import types
 
+import pytest
 
 from etl.base_importer import BaseDBImporter
 import db.connections as connections
 
 
+# Shared by every importer below; tests must treat it as read-only.
+_DEFAULT_ARGS = types.SimpleNamespace(
+    log_file=None,
+    csv_file=None,
+    include_empty=False,
+    skip_pk_creation=False,
+    config_file=None,
+    verbose=False,
+)
+
+
 class MiniImporter(BaseDBImporter):
     """Very small importer used for testing the run() workflow."""
 
@@ -18,14 +29,7 @@ class MiniImporter(BaseDBImporter):
 
     def parse_args(self):
         """Return a dummy args namespace expected by ``BaseDBImporter``."""
-        return argparse.Namespace(
-            log_file=None,
-            csv_file=None,
-            include_empty=False,
-            skip_pk_creation=False,
-            config_file=None,
-            verbose=False,
-        )
+        return _DEFAULT_ARGS
 
     # The following hooks implement a trivial workflow that simply creates
     # and populates a table in the temporary database.  All other optional
@@ -65,14 +69,7 @@ class FullImporter(BaseDBImporter):
     DEFAULT_LOG_FILE = "full.log"
 
     def parse_args(self):
-        return argparse.Namespace(
-            log_file=None,
-            csv_file=None,
-            include_empty=False,
-            skip_pk_creation=False,
-            config_file=None,
-            verbose=False,
-        )
+        return _DEFAULT_ARGS
 
     def execute_preprocessing(self, conn):
         conn.execute("CREATE TABLE src (id INTEGER PRIMARY KEY, val INTEGER)")
@@ -107,21 +104,31 @@ class FullImporter(BaseDBImporter):
         return False
 
 
-def test_end_to_end_mini_importer(monkeypatch, tmp_path):
-    """Run the ``MiniImporter`` using an in-memory SQLite database."""
-
-    # Provide required environment variables for ``validate_environment``.
-    monkeypatch.setenv("MSSQL_TARGET_CONN_STR", "Driver=SQLite;Database=:memory:")
-    monkeypatch.setenv("EJ_CSV_DIR", str(tmp_path))
-    monkeypatch.setenv("EJ_LOG_DIR", str(tmp_path))
+@pytest.fixture
+def sqlite_target(monkeypatch):
+    """Serve an autocommit in-memory SQLite database as the target connection."""
+    # ``isolation_level=None`` skips sqlite3's implicit BEGIN before each DML
+    # statement; the importers under test do not rely on transactions.
+    conn = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
 
-    # Use an in-memory SQLite database instead of MSSQL.
-    conn = sqlite3.connect(":memory:")
+    # The importers never read the environment here, so skip its validation.
+    monkeypatch.setattr("etl.base_importer.validate_environment", lambda *a, **k: None)
 
     # Patch the connection retrieval used inside BaseDBImporter
     monkeypatch.setattr(connections, "get_target_connection", lambda: conn)
     monkeypatch.setattr("etl.base_importer.get_target_connection", lambda: conn)
 
+    yield conn
+
+    # Explicitly close the connection to release resources.
+    conn.close()
+
+
+def test_end_to_end_mini_importer(sqlite_target):
+    """Run the ``MiniImporter`` using an in-memory SQLite database."""
+
+    conn = sqlite_target
+
     importer = MiniImporter()
 
     # ``run`` should complete successfully and return ``False`` since our
@@ -135,21 +142,11 @@ def test_end_to_end_mini_importer(monkeypatch, tmp_path):
     cur.close()
     assert count == 2
 
-    # Explicitly close the connection to release resources.
-    conn.close()
-
 
-def test_end_to_end_full_importer(monkeypatch, tmp_path):
+def test_end_to_end_full_importer(sqlite_target):
     """Run the ``FullImporter`` to exercise the complete workflow."""
 
-    monkeypatch.setenv("MSSQL_TARGET_CONN_STR", "Driver=SQLite;Database=:memory:")
-    monkeypatch.setenv("EJ_CSV_DIR", str(tmp_path))
-    monkeypatch.setenv("EJ_LOG_DIR", str(tmp_path))
-
-    conn = sqlite3.connect(":memory:")
-
-    monkeypatch.setattr(connections, "get_target_connection", lambda: conn)
-    monkeypatch.setattr("etl.base_importer.get_target_connection", lambda: conn)
+    conn = sqlite_target
 
     importer = FullImporter()
 
@@ -158,5 +155,3 @@ def test_end_to_end_full_importer(monkeypatch, tmp_path):
     rows = conn.execute("SELECT id, val FROM dest ORDER BY id").fetchall()
     assert rows == [(1, 10), (2, 20)]
 
-    conn.close()
-
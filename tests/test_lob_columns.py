@@ -1,154 +1,64 @@
 import importlib
 import math
-import sys
-import types
-import time
-
-# Stub optional dependencies like in other tests
-dummy = types.ModuleType("tqdm")
-class _DummyTqdm:
-    def __init__(self, iterable=None, **kwargs):
-        self.iterable = iterable or []
-    def __iter__(self):
-        return iter(self.iterable)
-    def update(self, n=1):
-        pass
-    def close(self):
-        pass
-def _tqdm(iterable=None, **kwargs):
-    return _DummyTqdm(iterable)
-dummy.tqdm = _tqdm
-sys.modules["tqdm"] = dummy
-if "pyodbc" not in sys.modules:
-    class _DummyError(Exception):
-        pass
-    sys.modules["pyodbc"] = types.SimpleNamespace(Error=_DummyError)
-if "pandas" not in sys.modules:
-    sys.modules["pandas"] = types.ModuleType("pandas")
-if "sqlalchemy" not in sys.modules:
-    sa_mod = types.ModuleType("sqlalchemy")
-    sa_mod.types = types.SimpleNamespace(Text=lambda *a, **k: None)
-    sa_mod.MetaData = lambda *a, **k: None
-    pool_mod = types.ModuleType("pool")
-    pool_mod.NullPool = object
-    sa_mod.pool = pool_mod
-    engine_mod = types.ModuleType("engine")
-    engine_mod.Engine = object
-    engine_mod.Connection = object
-    sa_mod.engine = engine_mod
-    sys.modules["sqlalchemy"] = sa_mod
-    sys.modules["sqlalchemy.types"] = sa_mod.types
-    sys.modules["sqlalchemy.pool"] = pool_mod
-    sys.modules["sqlalchemy.engine"] = engine_mod
-if "mysql" not in sys.modules:
-    dummy_mysql = types.ModuleType("mysql")
-    dummy_mysql.connector = types.SimpleNamespace(connect=lambda **k: None)
-    sys.modules["mysql"] = dummy_mysql
-    sys.modules["mysql.connector"] = dummy_mysql.connector
-if "dotenv" not in sys.modules:
-    mod = types.ModuleType("dotenv")
-    mod.load_dotenv = lambda *a, **k: None
-    sys.modules["dotenv"] = mod
-if "pydantic" not in sys.modules:
-    pd_mod = types.ModuleType("pydantic")
-    class _BaseSettings:
-        def __init__(self, **values):
-            for k, v in values.items():
-                setattr(self, k, v)
-    pd_mod.BaseSettings = _BaseSettings
-    pd_mod.DirectoryPath = str
-    pd_mod.Field = lambda *a, **k: None
-    class _SecretStr(str):
-        def get_secret_value(self):
-            return str(self)
-    pd_mod.SecretStr = _SecretStr
-    def _validator(*a, **k):
-        def dec(func):
-            return func
-        return dec
-    pd_mod.validator = _validator
-    sys.modules["pydantic"] = pd_mod
-    ps_mod = types.ModuleType("pydantic_settings")
-    ps_mod.BaseSettings = _BaseSettings
-    sys.modules["pydantic_settings"] = ps_mod
 
-lob = importlib.import_module("04_LOBColumns")
-
-class DummySelectCursor:
-    def __init__(self, rows):
-        self.rows = rows
-        self.index = 0
-        self.description = [("SchemaName",), ("TableName",), ("ColumnName",), ("DataType",), ("CurrentLength",), ("RowCnt",)]
-
-    def fetchmany(self, size):
-        if self.index >= len(self.rows):
-            return []
-        res = self.rows[self.index : self.index + size]
-        self.index += len(res)
-        return res
+import pytest
 
-class DummyUpdateCursor:
-    def __init__(self, conn):
-        self.conn = conn
-        self.executed = []
-        self.fast_executemany = False
+from tests._doubles import DummyConn, DummySelectCursor, DummyUpdateCursor
 
-    def executemany(self, sql, params):
-        self.executed.extend(params)
+lob = importlib.import_module("04_LOBColumns")
 
-    def execute(self, sql, params=None):
-        if params:
-            self.executed.append(params)
+# Rows shared by the batching tests; built once at import time.
+_LOB_ROWS = [("s", "t", "c" + str(i), "text", None, 1) for i in range(250)]
 
-    def __enter__(self):
-        return self
 
-    def __exit__(self, exc_type, exc, tb):
-        pass
+class UpdateConn(DummyConn):
+    """Connection handing out ``DummyUpdateCursor`` instances."""
 
-class DummyConn:
     def __init__(self):
-        self.autocommit = True
-        self.commits = 0
-        self.rollbacks = 0
+        super().__init__()
         self.last_cursor = None
 
     def cursor(self):
         self.last_cursor = DummyUpdateCursor(self)
         return self.last_cursor
 
-    def commit(self):
-        self.commits += 1
 
-    def rollback(self):
-        self.rollbacks += 1
+@pytest.fixture
+def lob_mod(monkeypatch):
+    """Return the LOB module with ``get_max_length`` stubbed out."""
+    monkeypatch.setattr(lob, "get_max_length", lambda *a, **k: 10)
+    return lob
+
 
-def test_gather_lob_columns_batches(monkeypatch):
-    rows = [("s", "t", f"c{i}", "text", None, 1) for i in range(250)]
+def test_gather_lob_columns_batches(monkeypatch, lob_mod):
+    rows = _LOB_ROWS
     select_cursor = DummySelectCursor(rows)
-    monkeypatch.setattr(lob, "execute_sql_with_timeout", lambda conn, q, timeout: select_cursor)
-    monkeypatch.setattr(lob, "get_max_length", lambda *a, **k: 10)
+    call_count = 0
+
+    def fake_exec(conn, q, timeout):
+        nonlocal call_count
+        call_count += 1
+        return select_cursor
 
-    conn = DummyConn()
+    monkeypatch.setattr(lob_mod, "execute_sql_with_timeout", fake_exec)
+
+    conn = UpdateConn()
     cfg = {"include_empty_tables": True, "sql_timeout": 30, "batch_size": 100}
 
-    start = time.perf_counter()
-    lob.gather_lob_columns(conn, cfg, "log.txt")
-    elapsed = time.perf_counter() - start
+    lob_mod.gather_lob_columns(conn, cfg, "log.txt")
 
     expected_batches = math.ceil(len(rows) / cfg["batch_size"]) + 1  # final commit from transaction_scope
     assert conn.commits == expected_batches
     assert len(conn.last_cursor.executed) == len(rows)
-    assert elapsed < 1.0
+    assert call_count == 1
 
 
-def test_gather_lob_columns_override(monkeypatch):
+def test_gather_lob_columns_override(monkeypatch, lob_mod):
     rows = [("s", "t", "c", "text", None, 0)]
     select_cursor = DummySelectCursor(rows)
-    monkeypatch.setattr(lob, "execute_sql_with_timeout", lambda conn, q, timeout: select_cursor)
-    monkeypatch.setattr(lob, "get_max_length", lambda *a, **k: 10)
+    monkeypatch.setattr(lob_mod, "execute_sql_with_timeout", lambda conn, q, timeout: select_cursor)
 
-    conn = DummyConn()
+    conn = UpdateConn()
     cfg = {
         "include_empty_tables": False,
         "always_include_tables": ["s.t"],
@@ -156,5 +66,5 @@ def test_gather_lob_columns_override(monkeypatch):
         "batch_size": 10,
     }
 
-    lob.gather_lob_columns(conn, cfg, "log.txt")
+    lob_mod.gather_lob_columns(conn, cfg, "log.txt")
     assert len(conn.last_cursor.executed) == len(rows)
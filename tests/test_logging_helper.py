@@ -0,0 +1,39 @@
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+from utils import logging_helper
+
+
+def test_setup_logging_writes_through_queue_listener(monkeypatch, capsys):
+    root = logging.getLogger()
+    monkeypatch.setattr(root, 'handlers', [])
+    monkeypatch.setattr(root, 'filters', [])
+    monkeypatch.setattr(root, 'level', root.level)
+
+    logging_helper.setup_logging()
+    try:
+        assert [type(h) for h in root.handlers] == [QueueHandler]
+        logging.getLogger('etl.test').info('queued %s', 'message')
+    finally:
+        logging_helper.stop_logging()
+
+    assert '[-] INFO etl.test: queued message' in capsys.readouterr().err
+
+
+def test_operation_counts_survive_concurrent_updates():
+    before = dict(logging_helper.operation_counts)
+
+    def work():
+        for _ in range(1000):
+            logging_helper.record_success()
+        logging_helper.record_failure()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert logging_helper.operation_counts['success'] == before['success'] + 4000
+    assert logging_helper.operation_counts['failure'] == before['failure'] + 4
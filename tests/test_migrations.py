@@ -3,18 +3,17 @@ import types
 
 import pytest
 
-# Reuse DummyConn and DummyCursor from test_etl_helpers
-from tests.test_etl_helpers import DummyConn, DummyCursor
+from tests._doubles import DummyConn, DummyCursor
 from utils import etl_helpers
 from db import migrations
 
 
-def test_run_sql_script_idempotent(monkeypatch):
+def test_run_sql_script_idempotent(monkeypatch, no_migrations_applied):
     executed = []
 
     class TrackCursor(DummyCursor):
         def execute(self, sql, params=None):
-            if "SET LOCK_TIMEOUT" not in sql:
+            if not sql.startswith("SET "):
                 executed.append(sql)
             super().execute(sql, params)
 
@@ -22,21 +21,19 @@ def test_run_sql_script_idempotent(monkeypatch):
         def cursor(self):
             return TrackCursor(self.fail, self.fail_sql, conn=self)
 
-    applied = {}
+    applied = set()
 
-    monkeypatch.setattr(etl_helpers, "ensure_version_table", lambda conn: None)
-    monkeypatch.setattr(
-        etl_helpers, "has_migration", lambda conn, name: applied.get(name, False)
-    )
-    monkeypatch.setattr(
-        etl_helpers,
-        "record_migration",
-        lambda conn, name: applied.setdefault(name, True),
-    )
+    def fake_claim(conn, name, commit=True):
+        if name in applied:
+            return False
+        applied.add(name)
+        return True
+
+    monkeypatch.setattr(etl_helpers, "check_and_claim_migration", fake_claim)
 
     conn = TrackConn()
     etl_helpers.run_sql_script(conn, "script1", "SELECT 1;")
-    assert applied.get("script1") is True
+    assert "script1" in applied
     assert executed == ["SELECT 1"]
 
     etl_helpers.run_sql_script(conn, "script1", "SELECT 1;")
@@ -44,6 +41,27 @@ def test_run_sql_script_idempotent(monkeypatch):
     assert executed == ["SELECT 1"]
 
 
+def test_preloaded_migrations_skip_claim(monkeypatch, no_migrations_applied):
+    def fail_claim(conn, name, commit=True):
+        raise AssertionError("claim should not be needed")
+
+    monkeypatch.setattr(etl_helpers, "load_applied_migrations", lambda conn: {"script1"})
+    monkeypatch.setattr(etl_helpers, "check_and_claim_migration", fail_claim)
+
+    result = etl_helpers.run_sql_step(DummyConn(), "script1", "SELECT 1")
+    assert result is etl_helpers.STEP_SKIPPED
+
+
+def test_load_applied_migrations(monkeypatch):
+    monkeypatch.setattr(
+        migrations,
+        "_execute",
+        lambda conn, sql, params=None, fetch=False: [("a",), {"script_name": "b"}],
+    )
+
+    assert migrations.load_applied_migrations(object()) == {"a", "b"}
+
+
 def test_has_migration_true(monkeypatch):
     calls = {}
 
@@ -65,3 +83,51 @@ def test_has_migration_false(monkeypatch):
     )
 
     assert migrations.has_migration(object(), "script") is False
+
+
+def test_check_and_claim_migration(monkeypatch):
+    calls = {}
+
+    def fake_execute(conn, sql, params=None, fetch=False, commit=True):
+        calls["sql"] = sql
+        calls["params"] = params
+        return [("INSERT",)]
+
+    monkeypatch.setattr(migrations, "_execute", fake_execute)
+
+    assert migrations.check_and_claim_migration(object(), "script") is True
+    assert calls["sql"].startswith("MERGE")
+    assert calls["params"] == ("script",)
+
+
+def test_check_and_claim_migration_without_commit_leaves_transaction_open():
+    conn = DummyConn()
+    conn.autocommit = False
+    assert migrations.check_and_claim_migration(conn, "script", commit=False) is True
+    assert conn.commits == 0
+
+
+def test_check_and_claim_migration_already_applied(monkeypatch):
+    monkeypatch.setattr(
+        migrations, "_execute", lambda conn, sql, params=None, fetch=False, commit=True: []
+    )
+
+    assert migrations.check_and_claim_migration(object(), "script") is False
+
+
+def test_applied_migrations_and_record_migrations(monkeypatch):
+    calls = []
+
+    def fake_execute(conn, sql, params=None, fetch=False, commit=True):
+        calls.append((sql, params))
+        return [("a",)] if fetch else None
+
+    monkeypatch.setattr(migrations, "_execute", fake_execute)
+
+    assert migrations.applied_migrations(object(), ["a", "b"]) == {"a"}
+    assert calls[-1][0].endswith("IN (?, ?)")
+    assert migrations.record_migrations(object(), ["a", "c"]) == {"a"}
+    sql, params = calls[-1]
+    assert sql.startswith("MERGE dbo.MigrationHistory WITH (HOLDLOCK)")
+    assert "USING (VALUES (?), (?))" in sql
+    assert params == ("a", "c")
@@ -4,33 +4,19 @@ import pytest
 
 import db.connections as connections
 
-class DummyConn:
-    pass
+from tests._doubles import DummyConn
 
-class DummyEngine:
-    def connect(self):
-        return DummyConn()
-
-def test_get_mysql_connection_env(monkeypatch):
+def test_get_mysql_connection_env(monkeypatch, fake_create_engine):
     monkeypatch.setenv('MYSQL_HOST', 'localhost')
     monkeypatch.setenv('MYSQL_USER', 'user')
     monkeypatch.setenv('MYSQL_PASSWORD', 'pass')
     monkeypatch.setenv('MYSQL_DATABASE', 'db')
     monkeypatch.setenv('MYSQL_PORT', '3307')
 
-    called = {}
-
-    def fake_create_engine(url, **kwargs):
-        called['url'] = url
-        called['kwargs'] = kwargs
-        return DummyEngine()
-
-    monkeypatch.setattr(connections.sqlalchemy, 'create_engine', fake_create_engine, raising=False)
-    monkeypatch.setattr(connections, '_engines', {}, raising=False)
-
     conn = connections.get_mysql_connection()
     assert isinstance(conn, DummyConn)
-    assert called['kwargs']['pool_size'] == connections.settings.db_pool_size
+    assert fake_create_engine['kwargs']['pool_size'] == connections.settings.db_pool_size
+    assert 'fast_executemany' not in fake_create_engine['kwargs']
 
 
 def test_get_mysql_connection_missing(monkeypatch):
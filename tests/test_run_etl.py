@@ -1,218 +1,208 @@
 import os
 import sys
 import types
+import contextlib
 import json
-import importlib.util
+import importlib
 from pathlib import Path
 import queue
+from unittest import mock
 
+import pytest
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def _import_run_etl_from_repo(tmp_cwd):
-    """Import run_etl.py as if executed from a different directory."""
-    run_etl_path = Path(__file__).resolve().parents[1] / "run_etl.py"
-    spec = importlib.util.spec_from_file_location("run_etl", run_etl_path)
-    module = importlib.util.module_from_spec(spec)
-    cwd = os.getcwd()
-    os.chdir(tmp_cwd)
+from etl import runner as _runner
+
+SCRIPT_PATHS = tuple(p for _, p in _runner.SCRIPTS)
+
+
+class DummyVar:
+    """Tk variable stand-in holding a fixed value."""
+
+    __slots__ = ("_v",)
+
+    def __init__(self, value):
+        self._v = value
+    def get(self):
+        return self._v
+
+
+class DummyEntry(DummyVar):
+    """Entry widget stand-in returning a fixed value."""
+
+    __slots__ = ()
+
+
+# Module name -> ``tkinter`` object that was installed when it was last imported
+_TK_SEEN: dict[str, object] = {}
+
+
+def _fast_json_load(path):
+    """Parse the JSON file at ``path``, using ``orjson`` when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path) as f:
+        return json.load(f)
+
+
+def _fast_json_dump(path, data):
+    """Write ``data`` to ``path`` as JSON, using ``orjson`` when it is installed."""
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data))
+        return
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    """Temporarily change the working directory (``contextlib.chdir`` is 3.11+)."""
+    previous = os.getcwd()
+    os.chdir(path)
     try:
-        spec.loader.exec_module(module)  # type: ignore
+        yield
     finally:
-        os.chdir(cwd)
+        os.chdir(previous)
+
+
+def _import_run_etl_from_repo(tmp_cwd=None):
+    """Import run_etl.py, optionally as if executed from ``tmp_cwd``.
+
+    The module is imported normally and cached in ``sys.modules``.  ``run_etl``
+    binds ``tkinter`` at import time, so it is reloaded only when a test has
+    installed a different ``tkinter`` stub since the last import.  Passing
+    ``tmp_cwd`` always re-executes the module from inside that directory.
+    """
+    tk_mod = sys.modules.get("tkinter")
+    with _chdir(tmp_cwd) if tmp_cwd is not None else contextlib.nullcontext():
+        module = sys.modules.get("run_etl")
+        if module is None:
+            module = importlib.import_module("run_etl")
+        elif tmp_cwd is not None or _TK_SEEN.get("run_etl") is not tk_mod:
+            module = importlib.reload(module)
+    _TK_SEEN["run_etl"] = tk_mod
     return module
 
 
-def _import_runner_from_repo():
-    """Import etl.runner from the repository."""
-    runner_path = Path(__file__).resolve().parents[1] / "etl" / "runner.py"
-    spec = importlib.util.spec_from_file_location("etl.runner", runner_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)  # type: ignore
-    return module
+@pytest.fixture(autouse=True)
+def _tk_modules(monkeypatch, tk_stub):
+    """Install the tkinter stub for the duration of each test."""
+    monkeypatch.setitem(sys.modules, "tkinter", tk_stub)
+    monkeypatch.setitem(sys.modules, "tkinter.filedialog", tk_stub.filedialog)
+    monkeypatch.setitem(sys.modules, "tkinter.messagebox", tk_stub.messagebox)
+    monkeypatch.setitem(sys.modules, "tkinter.scrolledtext", tk_stub.scrolledtext)
+
+
+@pytest.fixture
+def config_file(monkeypatch, tmp_path):
+    """Redirect ``run_etl.CONFIG_FILE`` to a per-test location."""
+    run_etl = _import_run_etl_from_repo()
+    path = tmp_path / "config" / "values.json"
+    monkeypatch.setattr(run_etl, "CONFIG_FILE", str(path))
+    return path
 
 
-def test_load_config_from_other_directory(tmp_path):
+@pytest.fixture
+def app_harness():
+    """Widget and queue attributes that ``App.run_script`` touches."""
+    button = types.SimpleNamespace(config=lambda **k: None)
+    label = types.SimpleNamespace(set=lambda s: None)
+    return types.SimpleNamespace(
+        include_empty_var=DummyVar(False),
+        auto_scroll_var=DummyVar(False),
+        run_buttons=dict.fromkeys(SCRIPT_PATHS, button),
+        status_labels=dict.fromkeys(SCRIPT_PATHS, label),
+        output_text=types.SimpleNamespace(insert=lambda *a, **k: None, see=lambda *a, **k: None),
+        update_queue=queue.Queue(),
+        status_queue=queue.Queue(),
+    )
+
+
+def test_load_config_from_other_directory(monkeypatch, tmp_path):
     run_etl = _import_run_etl_from_repo(tmp_path)
 
     # Ensure CONFIG_FILE is absolute and points to the repo config directory
     assert os.path.isabs(run_etl.CONFIG_FILE)
     assert run_etl.CONFIG_FILE.endswith(os.path.join("config", "values.json"))
+    monkeypatch.setattr(run_etl, "CONFIG_FILE", str(tmp_path / "config" / "values.json"))
 
     # Write a sample config file at the expected location
     os.makedirs(os.path.dirname(run_etl.CONFIG_FILE), exist_ok=True)
-    with open(run_etl.CONFIG_FILE, "w") as f:
-        json.dump({"driver": "dummy"}, f)
+    _fast_json_dump(run_etl.CONFIG_FILE, {"driver": "dummy"})
 
     config = run_etl.App._load_config(object())
     assert config.get("driver") == "dummy"
 
 
-def test_save_config_writes_absolute_path(tmp_path):
-    run_etl = _import_run_etl_from_repo(tmp_path)
-
-    class DummyVar:
-        def __init__(self, value):
-            self._v = value
-        def get(self):
-            return self._v
+def test_save_config_writes_absolute_path(config_file):
+    run_etl = _import_run_etl_from_repo()
 
     dummy_app = types.SimpleNamespace(
-        entries={name: types.SimpleNamespace(get=lambda n=name: f"val_{n}")
+        entries={name: DummyEntry(f"val_{name}")
                  for name in ["driver", "server", "database", "user", "password"]},
         csv_dir_var=DummyVar("/tmp/csv"),
         include_empty_var=DummyVar(True),
     )
 
     run_etl.App._save_config(dummy_app)
-    assert os.path.exists(run_etl.CONFIG_FILE)
-    with open(run_etl.CONFIG_FILE) as f:
-        data = json.load(f)
+    assert config_file.is_file()
+    data = _fast_json_load(run_etl.CONFIG_FILE)
     assert data["csv_dir"] == "/tmp/csv"
 
 
-def test_save_config_preserves_custom_keys(tmp_path):
-    run_etl = _import_run_etl_from_repo(tmp_path)
+def test_save_config_preserves_custom_keys(config_file):
+    run_etl = _import_run_etl_from_repo()
 
     # Pre-create config with extra key
     os.makedirs(os.path.dirname(run_etl.CONFIG_FILE), exist_ok=True)
-    with open(run_etl.CONFIG_FILE, "w") as f:
-        json.dump({"always_include_tables": ["s.t"]}, f)
-
-    class DummyVar:
-        def __init__(self, value):
-            self._v = value
-        def get(self):
-            return self._v
+    _fast_json_dump(run_etl.CONFIG_FILE, {"always_include_tables": ["s.t"]})
 
     dummy_app = types.SimpleNamespace(
-        entries={name: types.SimpleNamespace(get=lambda: "val")
+        entries={name: DummyEntry("val")
                  for name in ["driver", "server", "database", "user", "password"]},
         csv_dir_var=DummyVar("/tmp/csv"),
         include_empty_var=DummyVar(False),
     )
 
     run_etl.App._save_config(dummy_app)
-    with open(run_etl.CONFIG_FILE) as f:
-        data = json.load(f)
+    data = _fast_json_load(run_etl.CONFIG_FILE)
     assert data.get("always_include_tables") == ["s.t"]
 
 
-def test_show_script_widgets_preserves_order(monkeypatch, tmp_path):
+def test_show_script_widgets_preserves_order(monkeypatch):
     """Buttons should be created in the order defined by ``SCRIPTS``."""
-    # Build a minimal tkinter stub with the widget methods used by ``App``.
-    class DummyWidget:
-        def __init__(self, *a, **kw):
-            pass
-        def grid(self, *a, **kw):
-            pass
-        def pack(self, *a, **kw):
-            pass
-        def config(self, *a, **kw):
-            pass
-        def insert(self, *a, **kw):
-            pass
-        def get(self):
-            return ""
-        def delete(self, *a, **kw):
-            pass
-        def see(self, *a, **kw):
-            pass
-        def grid_rowconfigure(self, *a, **kw):
-            pass
-        def grid_columnconfigure(self, *a, **kw):
-            pass
-
-    class DummyEntry(DummyWidget):
-        def __init__(self, *a, **kw):
-            super().__init__(*a, **kw)
-            self._val = ""
-        def insert(self, idx, val):
-            self._val = val
-        def get(self):
-            return self._val
-
-    class DummyVar:
-        def __init__(self, value=None):
-            self._v = value
-        def get(self):
-            return self._v
-        def set(self, val):
-            self._v = val
-
-    class DummyTk(DummyWidget):
-        def title(self, *a, **k):
-            pass
-        def resizable(self, *a, **k):
-            pass
-        def minsize(self, *a, **k):
-            pass
-        def after(self, *a, **k):
-            pass
-
-    class DummyScrolled(DummyWidget):
-        pass
-
-    tk = types.SimpleNamespace(
-        Tk=DummyTk,
-        Label=DummyWidget,
-        Entry=DummyEntry,
-        Button=DummyWidget,
-        Checkbutton=DummyWidget,
-        Frame=DummyWidget,
-        BooleanVar=DummyVar,
-        StringVar=DummyVar,
-        scrolledtext=types.SimpleNamespace(ScrolledText=DummyScrolled),
-        filedialog=types.SimpleNamespace(askdirectory=lambda: ""),
-        messagebox=types.SimpleNamespace(showerror=lambda *a, **k: None,
-                                         showinfo=lambda *a, **k: None,
-                                         askyesno=lambda *a, **k: True),
-        END=None,
-        WORD=None,
-        LEFT=None,
-        DISABLED="disabled",
-    )
-
-    monkeypatch.setitem(sys.modules, "tkinter", tk)
-    monkeypatch.setitem(sys.modules, "tkinter.filedialog", tk.filedialog)
-    monkeypatch.setitem(sys.modules, "tkinter.messagebox", tk.messagebox)
-    monkeypatch.setitem(sys.modules, "tkinter.scrolledtext", tk.scrolledtext)
-
     monkeypatch.setitem(sys.modules, "pyodbc",
                         types.SimpleNamespace(Error=Exception,
                                              connect=lambda *a, **k: None))
 
-    run_etl = _import_run_etl_from_repo(tmp_path)
+    run_etl = _import_run_etl_from_repo()
     app = run_etl.App()
     app._show_script_widgets()
 
-    assert list(app.run_buttons.keys()) == [p for _, p in run_etl.SCRIPTS]
+    assert tuple(app.run_buttons) == SCRIPT_PATHS
 
 
-def test_build_conn_str(tmp_path):
-    run_etl = _import_run_etl_from_repo(tmp_path)
-
-    class DummyEntry:
-        def __init__(self, val):
-            self._v = val
-        def get(self):
-            return self._v
+@pytest.mark.parametrize("values,expected", [
+    (("{SQL}", "srv", "db", "u", "p"), "DRIVER={SQL};SERVER=srv;DATABASE=db;UID=u;PWD=p"),
+    (("", "srv", "db", "u", "p"), "DRIVER={ODBC Driver 17 for SQL Server};SERVER=srv;DATABASE=db;UID=u;PWD=p"),
+    (("{SQL}", "srv", "", "", ""), "DRIVER={SQL};SERVER=srv"),
+])
+def test_build_conn_str(values, expected):
+    run_etl = _import_run_etl_from_repo()
 
+    fields = ("driver", "server", "database", "user", "password")
     app = types.SimpleNamespace(
-        entries={
-            'driver': DummyEntry('{SQL}'),
-            'server': DummyEntry('srv'),
-            'database': DummyEntry('db'),
-            'user': DummyEntry('u'),
-            'password': DummyEntry('p'),
-        }
+        entries={name: DummyEntry(value) for name, value in zip(fields, values)}
     )
 
-    assert run_etl.App._build_conn_str(app) == 'DRIVER={SQL};SERVER=srv;DATABASE=db;UID=u;PWD=p'
-
+    assert run_etl.App._build_conn_str(app) == expected
 
-def test_run_sequential_etl_restores_env(monkeypatch, tmp_path):
-    runner = _import_runner_from_repo()
 
+def test_run_sequential_etl_restores_env(monkeypatch):
     calls = []
     def make_mod(name, ret=True):
         mod = types.SimpleNamespace()
@@ -228,95 +218,28 @@ def test_run_sequential_etl_restores_env(monkeypatch, tmp_path):
         '03_FinancialDB_Import': make_mod('03'),
         '04_LOBColumns': make_mod('04'),
     }
-    for name, mod in modules.items():
-        monkeypatch.setitem(sys.modules, name, mod)
-
     monkeypatch.setenv('FOO', 'old')
-    runner.run_sequential_etl({'FOO': 'new'})
+    with mock.patch.dict(sys.modules, modules):
+        _runner.run_sequential_etl({'FOO': 'new'})
 
     assert os.environ['FOO'] == 'old'
     assert calls == ['01', '02']
 
 
-def test_run_script_resume(monkeypatch, tmp_path):
-    class DummyWidget:
-        def __init__(self, *a, **k):
-            pass
-        def grid(self, *a, **k):
-            pass
-        def pack(self, *a, **k):
-            pass
-        def config(self, *a, **k):
-            pass
-        def insert(self, *a, **k):
-            pass
-        def get(self):
-            return ""
-        def delete(self, *a, **k):
-            pass
-        def see(self, *a, **k):
-            pass
-        def grid_rowconfigure(self, *a, **k):
-            pass
-        def grid_columnconfigure(self, *a, **k):
-            pass
-
-    class DummyTk(DummyWidget):
-        def title(self, *a, **k):
-            pass
-        def resizable(self, *a, **k):
-            pass
-        def minsize(self, *a, **k):
-            pass
-        def after(self, *a, **k):
-            pass
-
-    class DummyEntry(DummyWidget):
-        def __init__(self, *a, **kw):
-            super().__init__(*a, **kw)
-            self._val = ""
-        def insert(self, idx, val):
-            self._val = val
-        def get(self):
-            return self._val
-
-    class DummyVar:
-        def __init__(self, value=None):
-            self._v = value
-        def get(self):
-            return self._v
-        def set(self, val):
-            self._v = val
-
-    class DummyScrolled(DummyWidget):
-        pass
-
-    tk = types.SimpleNamespace(
-        Tk=DummyTk,
-        Label=DummyWidget,
-        Entry=DummyEntry,
-        Button=DummyWidget,
-        Checkbutton=DummyWidget,
-        Frame=DummyWidget,
-        BooleanVar=DummyVar,
-        StringVar=DummyVar,
-        scrolledtext=types.SimpleNamespace(ScrolledText=DummyScrolled),
-        filedialog=types.SimpleNamespace(askdirectory=lambda: ""),
-        messagebox=types.SimpleNamespace(showerror=lambda *a, **k: None,
-                                         showinfo=lambda *a, **k: None,
-                                         askyesno=lambda *a, **k: True),
-        END=None,
-        WORD=None,
-        LEFT=None,
-        DISABLED="disabled",
-    )
+def test_restore_env_only_touches_snapshot_keys(monkeypatch):
+    monkeypatch.setenv('FOO', 'new')
+    monkeypatch.setenv('BAR', 'added')
+    monkeypatch.setenv('BAZ', 'untouched')
 
-    monkeypatch.setitem(sys.modules, "tkinter", tk)
-    monkeypatch.setitem(sys.modules, "tkinter.messagebox", tk.messagebox)
-    monkeypatch.setitem(sys.modules, "tkinter.scrolledtext", tk.scrolledtext)
-    monkeypatch.setitem(sys.modules, "tkinter.filedialog", tk.filedialog)
+    _runner._restore_env({'FOO': 'old', 'BAR': None})
+
+    assert os.environ['FOO'] == 'old'
+    assert 'BAR' not in os.environ
+    assert os.environ['BAZ'] == 'untouched'
 
-    run_etl = _import_run_etl_from_repo(tmp_path)
+
+def test_run_script_resume(monkeypatch, tmp_path, app_harness):
+    run_etl = _import_run_etl_from_repo()
 
     captured = {}
 
@@ -328,21 +251,15 @@ def test_run_script_resume(monkeypatch, tmp_path):
     monkeypatch.setattr(run_etl.messagebox, "askyesno", lambda *a, **k: True)
 
     app = run_etl.App()
+    vars(app).update(vars(app_harness))
     app.conn_str = "x"
     app.csv_dir = str(tmp_path)
-    app.include_empty_var = types.SimpleNamespace(get=lambda: False)
-    app.auto_scroll_var = types.SimpleNamespace(get=lambda: False)
-    app.run_buttons = {p: types.SimpleNamespace(config=lambda **k: None) for _, p in run_etl.SCRIPTS}
-    app.status_labels = {p: types.SimpleNamespace(set=lambda s: None) for _, p in run_etl.SCRIPTS}
-    app.output_text = types.SimpleNamespace(insert=lambda *a, **k: None, see=lambda *a, **k: None)
-    app.update_queue = queue.Queue()
-    app.status_queue = queue.Queue()
-
-    progress_file = tmp_path / (Path(run_etl.SCRIPTS[0][1]).stem + ".progress.json")
+
+    progress_file = tmp_path / (Path(SCRIPT_PATHS[0]).stem + ".progress.json")
     progress_file.write_text("{}")
     monkeypatch.setenv("EJ_LOG_DIR", str(tmp_path))
 
-    app.run_script(run_etl.SCRIPTS[0][1])
+    app.run_script(SCRIPT_PATHS[0])
 
     assert captured.get("RESUME") == "1"
     assert captured.get("PROGRESS_FILE") == str(progress_file)
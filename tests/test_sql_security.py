@@ -0,0 +1,52 @@
+import pytest
+
+from utils.sql_security import (
+    SQLSecurityValidator,
+    validate_sql_identifier,
+    validate_sql_statement,
+)
+
+
+def test_validate_sql_statement_allows_plain_select():
+    assert validate_sql_statement('SELECT a FROM t') == 'SELECT a FROM t'
+
+
+@pytest.mark.parametrize('sql, keyword', [
+    ('drop table t', 'DROP'),
+    ('SELECT 1; EXECUTE sp_who', 'EXECUTE'),
+    ('exec sp_who', 'EXEC'),
+])
+def test_validate_sql_statement_rejects_dangerous_keywords(sql, keyword):
+    with pytest.raises(ValueError, match=f'Dangerous keyword detected: {keyword}$'):
+        validate_sql_statement(sql)
+
+
+def test_validate_sql_statement_ignores_keywords_inside_identifiers():
+    sql = 'SELECT DroppedCount FROM dbo.DELETED_ROWS'
+    assert validate_sql_statement(sql) == sql
+
+
+def test_validate_sql_statement_allow_ddl():
+    assert validate_sql_statement('DROP TABLE t', allow_ddl=True) == 'DROP TABLE t'
+
+
+def test_validate_sql_statement_rejects_multiple_statements():
+    with pytest.raises(ValueError, match='Multiple statements'):
+        validate_sql_statement('SELECT 1; SELECT 2;')
+
+
+def test_validator_reports_issues():
+    result = SQLSecurityValidator().validate_sql_statement('TRUNCATE TABLE t')
+    assert result.is_valid is False
+    assert result.issues == ['Dangerous keyword detected: TRUNCATE']
+
+
+@pytest.mark.parametrize('identifier', ['Table_1', '_tmp'])
+def test_validate_sql_identifier_accepts(identifier):
+    assert validate_sql_identifier(identifier) == identifier
+
+
+@pytest.mark.parametrize('identifier', ['', '1abc', 'a-b', 'tbl\n', 'caf\u00e9', None])
+def test_validate_sql_identifier_rejects(identifier):
+    with pytest.raises(ValueError):
+        validate_sql_identifier(identifier)
@@ -1,14 +1,41 @@
 """Helper functions for executing SQL statements with logging and retries."""
 
+import asyncio
+import atexit
+import functools
+import itertools
 import logging
 import os
+import queue
+import random
+import re
+import threading
 import time
-from contextlib import contextmanager
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from logging.handlers import QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Generator, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 import sqlalchemy
 from config import ETLConstants, parse_database_name, settings
-from db.migrations import ensure_version_table, has_migration, record_migration
+from db.connections import get_target_connection
+from db.migrations import (
+    check_and_claim_migration,
+    ensure_version_table,
+    load_applied_migrations,
+    record_migrations,
+)
 from utils.logging_helper import record_failure, record_success
 
 
@@ -31,14 +58,129 @@ class SQLExecutionError(ETLError):
 
 logger = logging.getLogger(__name__)
 
+try:
+    import pyodbc
 
-def log_exception_to_file(error_details: str, log_path: str) -> None:
-    """Append exception details to a log file."""
-    try:
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {error_details}\n")
-    except Exception as file_exc:
-        logger.error(f"Failed to write to error log file: {file_exc}")
+    _PYODBC_ERROR: Optional[type] = pyodbc.Error
+except ImportError:  # pragma: no cover - only SQLAlchemy connections available
+    _PYODBC_ERROR = None
+
+#: Lower-case substrings (messages and SQL Server error numbers) of errors
+#: worth retrying when the SQLSTATE does not identify them: timeouts, lock
+#: timeouts, deadlocks and dropped connections.
+_TRANSIENT_TOKENS = (
+    "timeout",
+    "lock request time out",
+    "deadlock",
+    "communication link failure",
+    "41301",
+    "1205",
+    "1222",
+)
+
+#: SQLSTATEs of transient errors: serialization failure/deadlock, timeouts
+#: and communication link failure.
+_TRANSIENT_SQLSTATES = frozenset({"40001", "HYT00", "HYT01", "08S01"})
+
+#: SQL Server native error numbers of transient errors reported under a
+#: generic SQLSTATE: deadlock victim, lock request timeout and in-memory
+#: OLTP validation failure.
+_TRANSIENT_NATIVE_ERRORS = frozenset({"1205", "1222", "41301"})
+
+# Native error number pyodbc appends to a message just before the ODBC
+# function name, e.g. ``... exceeded. (1222) (SQLExecDirectW)``.  Other
+# parenthesized numbers (such as key values) are not matched.
+_NATIVE_ERROR_RE = re.compile(r"\((\d+)\)\s*\(SQL\w+\)\s*$")
+
+#: Upper bound in seconds for a single retry backoff sleep
+_RETRY_BACKOFF_CAP = 30
+
+
+#: Size in bytes at which exception log files roll over, and copies kept
+_EXC_LOG_MAX_BYTES = 10_000_000
+_EXC_LOG_BACKUP_COUNT = 5
+
+
+class _ExceptionFileHandler(logging.Handler):
+    """Write queued exception records to a rotating file per ``log_path``."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._files: dict[str, RotatingFileHandler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            handler = self._files.get(record.log_path)
+            if handler is None:
+                handler = RotatingFileHandler(
+                    record.log_path,
+                    maxBytes=_EXC_LOG_MAX_BYTES,
+                    backupCount=_EXC_LOG_BACKUP_COUNT,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(
+                    logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+                )
+                self._files[record.log_path] = handler
+            handler.emit(record)
+        except Exception as file_exc:
+            logger.error(f"Failed to write to error log file: {file_exc}")
+
+    def close(self) -> None:
+        for handler in self._files.values():
+            handler.close()
+        self._files.clear()
+        super().close()
+
+
+_exc_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_exc_listener: Optional[QueueListener] = None
+_exc_listener_lock = threading.Lock()
+
+
+def _start_exception_listener() -> None:
+    """Start the background writer for :func:`log_exception_to_file`."""
+    global _exc_listener
+    with _exc_listener_lock:
+        if _exc_listener is None:
+            _exc_listener = QueueListener(_exc_queue, _ExceptionFileHandler())
+            _exc_listener.start()
+
+
+def _stop_exception_listener() -> None:
+    """Flush queued exception records and close their files."""
+    global _exc_listener
+    with _exc_listener_lock:
+        if _exc_listener is not None:
+            _exc_listener.stop()
+            for handler in _exc_listener.handlers:
+                handler.close()
+            _exc_listener = None
+
+
+atexit.register(_stop_exception_listener)
+
+
+def log_exception_to_file(
+    error_details: str, log_path: str, flush: bool = False
+) -> None:
+    """Append exception details to a log file.
+
+    The line is queued and written by a background thread through a
+    rotating file handler, so callers never block on file I/O.  It may not
+    be on disk yet when this returns; pass ``flush=True`` on fatal paths
+    (e.g. before showing an error dialog or exiting) to write every queued
+    line before returning.
+    """
+    _start_exception_listener()
+    record = logging.LogRecord(
+        __name__, logging.ERROR, __file__, 0, error_details, None, None
+    )
+    record.log_path = os.fspath(log_path)
+    _exc_queue.put(record)
+    if flush:
+        # Drains the queue and closes the files; the next call restarts it
+        _stop_exception_listener()
 
 
 @contextmanager
@@ -65,21 +207,21 @@ def transaction_scope(conn: Any) -> Generator[Any, None, None]:
             conn.autocommit = original_autocommit
 
 
-def load_sql(filename: str, db_name: Optional[str] = None) -> str:
-    """Load a SQL file from the ``sql_scripts`` package.
+# ``{{NAME}}`` placeholders in SQL files; ``split`` yields alternating
+# literal text and placeholder names.
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
 
-    The function uses :mod:`importlib.resources` so it works when the project is
-    bundled with tools like PyInstaller.  SQL files use the ``{{DB_NAME}}``
-    placeholder which will be replaced with the provided ``db_name``.  If no
-    value is supplied, the function attempts to use ``run_etl.app``'s configured
-    database name or the one from :mod:`config.settings`.
+# Root of the ``sql_scripts`` package that SQL file paths must stay inside
+_SQL_BASE = (Path(__file__).resolve().parent.parent / "sql_scripts").resolve()
 
-    Args:
-        filename: Path to SQL file relative to ``sql_scripts`` package
-        db_name: Optional database name to substitute for ``{{DB_NAME}}``
 
-    Returns:
-        SQL content with database name substituted if provided
+@functools.lru_cache(maxsize=512)
+def _load_sql_cached(filename: str) -> Tuple[str, ...]:
+    """Read ``filename`` from ``sql_scripts`` split around its placeholders.
+
+    Results are cached per file so scripts executed many times during a run
+    are only read once.  Odd items of the returned tuple are placeholder
+    names and even items the literal SQL between them.
     """
 
     # Normalize the requested file path and ensure it does not escape the
@@ -90,9 +232,7 @@ def load_sql(filename: str, db_name: Optional[str] = None) -> str:
         logger.error(f"Attempted absolute SQL path: {filename}")
         raise ValueError(f"Invalid SQL file path: {filename}")
 
-    base_path = (Path(__file__).resolve().parent.parent / "sql_scripts").resolve()
-    target_path = (base_path / path).resolve()
-    if not str(target_path).startswith(str(base_path)):
+    if not (_SQL_BASE / path).resolve().is_relative_to(_SQL_BASE):
         logger.error(f"Attempted SQL path traversal: {filename}")
         raise ValueError(f"Invalid SQL file path: {filename}")
 
@@ -111,16 +251,31 @@ def load_sql(filename: str, db_name: Optional[str] = None) -> str:
         logger.error(f"SQL file not found: {filename}")
         raise FileNotFoundError(f"SQL file not found: {filename}") from exc
 
-    if db_name is None:
-        # Try to get the database name from the running UI if available
-        try:
-            import run_etl
+    return tuple(_PLACEHOLDER_RE.split(sql))
 
-            app = getattr(run_etl, "app", None)
-            if app and hasattr(app, "entries"):
-                db_name = app.entries["database"].get()
-        except Exception:
-            pass
+
+def load_sql(filename: str, db_name: Optional[str] = None) -> str:
+    """Load a SQL file from the ``sql_scripts`` package.
+
+    The function uses :mod:`importlib.resources` so it works when the project is
+    bundled with tools like PyInstaller.  SQL files use the ``{{DB_NAME}}``
+    placeholder which will be replaced with the provided ``db_name``.  If no
+    value is supplied, the database name from :mod:`config.settings` is used
+    (the GUI exports its entry as ``MSSQL_TARGET_DB_NAME``).  Loaded scripts
+    are cached; call ``load_sql.cache_clear()`` to force a re-read.
+
+    Args:
+        filename: Path to SQL file relative to ``sql_scripts`` package
+        db_name: Optional database name to substitute for ``{{DB_NAME}}``
+
+    Returns:
+        SQL content with database name substituted if provided
+    """
+
+    # Validates the path before anything else and is served from the cache
+    parts = _load_sql_cached(filename)
+    if len(parts) == 1:
+        return parts[0]
 
     if db_name is None:
         conn_val = (
@@ -130,55 +285,346 @@ def load_sql(filename: str, db_name: Optional[str] = None) -> str:
         )
         db_name = settings.mssql_target_db_name or parse_database_name(conn_val)
 
-    if db_name:
-        sql = sql.replace("{{DB_NAME}}", db_name)
-        logger.debug(f"Replaced database placeholder in {filename} with {db_name}")
+    values = {"DB_NAME": db_name} if db_name else {}
+    if values:
+        logger.debug("Replaced database placeholder in %s with %s", filename, db_name)
+    pieces = list(parts)
+    for i in range(1, len(pieces), 2):
+        pieces[i] = values.get(pieces[i]) or f"{{{{{pieces[i]}}}}}"
+    return "".join(pieces)
 
-    return sql
 
+load_sql.cache_clear = _load_sql_cached.cache_clear  # type: ignore[attr-defined]
 
-def run_sql_step(
-    conn: Any, name: str, sql: str, timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT
+
+class _ConnectionCache:
+    """Values cached per connection, including connections without weakrefs.
+
+    pyodbc connections cannot be weakly referenced, so entries are keyed by
+    ``id(conn)`` and hold the connection itself, which keeps the id from being
+    reused and lets lookups confirm identity.  Only the ``maxsize`` most
+    recently stored connections are kept, so closed ones are released.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self._entries: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def get(self, conn: Any, default: Any = None) -> Any:
+        entry = self._entries.get(id(conn))
+        if entry is None or entry[0] is not conn:
+            return default
+        return entry[1]
+
+    def __setitem__(self, conn: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[id(conn)] = (conn, value)
+            self._entries.move_to_end(id(conn))
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+
+# Connection -> migration names known to be applied on it.  A connection
+# present here also has its version table ensured.
+_applied_migrations = _ConnectionCache()
+
+
+def _applied_cache(conn: Any) -> set[str]:
+    """Return the cached applied migration names for ``conn``.
+
+    The first time a connection is seen the version table is ensured and
+    every applied name is loaded with one query, so later checks for scripts
+    that have already run need no round trip.
+    """
+    applied = _applied_migrations.get(conn)
+    if applied is None:
+        ensure_version_table(conn)
+        applied = load_applied_migrations(conn)
+        _applied_migrations[conn] = applied
+    return applied
+
+
+class _AlreadyApplied(Exception):
+    """Raised to roll back work for a migration another worker recorded first."""
+
+
+def _record_applied(conn: Any, name: str) -> None:
+    """Record ``name`` as applied in the caller's open transaction.
+
+    The record commits or rolls back together with the migration's work, so
+    a failure or crash never leaves it marked as applied.  If another worker
+    recorded it first, :class:`_AlreadyApplied` is raised so the surrounding
+    transaction discards this worker's copy of the work.
+    """
+    if not check_and_claim_migration(conn, name, commit=False):
+        raise _AlreadyApplied(name)
+
+
+# Connection type -> whether it is a SQLAlchemy connection (``execute`` but
+# no DB-API ``cursor``), so the attribute probes run once per type.
+_SQLALCHEMY_CONN_TYPES: dict[type, bool] = {}
+
+
+def _is_sqlalchemy(conn: Any) -> bool:
+    """Return ``True`` for SQLAlchemy connections, ``False`` for DB-API ones."""
+    cls = type(conn)
+    is_sqla = _SQLALCHEMY_CONN_TYPES.get(cls)
+    if is_sqla is None:
+        is_sqla = hasattr(conn, "execute") and not hasattr(conn, "cursor")
+        _SQLALCHEMY_CONN_TYPES[cls] = is_sqla
+    return is_sqla
+
+
+# Connection -> LOCK_TIMEOUT (ms) last sent on it.  The setting is
+# session-scoped, so it only needs re-sending when the value changes.
+_lock_timeouts = _ConnectionCache()
+
+
+def _set_lock_timeout(conn: Any, cursor: Any, timeout: int) -> None:
+    """Issue ``SET LOCK_TIMEOUT`` on ``cursor`` unless ``conn`` already has it."""
+    timeout_ms = timeout * 1000
+    if _lock_timeouts.get(conn) == timeout_ms:
+        return
+    cursor.execute(f"SET LOCK_TIMEOUT {timeout_ms}")
+    _lock_timeouts[conn] = timeout_ms
+
+
+def _log_rowcount(name: str, rowcount: int) -> None:
+    """Log the outcome of a statement that returned no result set."""
+    if rowcount is not None and rowcount >= 0:
+        logger.info("%s: Statement executed (%s rows affected)", name, rowcount)
+    else:
+        logger.info("%s: Statement executed (no results to fetch)", name)
+
+
+# Receives each chunk of rows when a step's results are streamed
+RowConsumer = Callable[[Sequence[Any]], None]
+
+
+def _fetch_rows(
+    name: str, source: Any, consume: Optional[RowConsumer]
 ) -> Optional[List[Any]]:
-    logger.info(f"Starting step: {name}")
-    start_time = time.time()
+    """Fetch a step's rows from ``source`` (a cursor or result).
+
+    With ``consume`` the rows are handed over in chunks of
+    :attr:`ETLConstants.FETCH_CHUNK_SIZE` and never held all at once, and
+    ``None`` is returned; otherwise every row is returned in a list.
+    """
+    if consume is None:
+        results = source.fetchall()
+        logger.info("%s: Retrieved %s rows", name, len(results))
+        return results
+    total = 0
+    while chunk := source.fetchmany(ETLConstants.FETCH_CHUNK_SIZE):
+        consume(chunk)
+        total += len(chunk)
+    logger.info("%s: Streamed %s rows", name, total)
+    return None
+
+
+def _execute_step_sqlalchemy(
+    conn: Any,
+    name: str,
+    sql: str,
+    timeout: int,
+    consume: Optional[RowConsumer] = None,
+) -> Optional[List[Any]]:
+    """Run a step on a SQLAlchemy connection; ``timeout`` is not applied."""
+    result = conn.execute(sqlalchemy.text(sql))
+    if getattr(result, "returns_rows", True):
+        return _fetch_rows(name, result, consume)
+    _log_rowcount(name, getattr(result, "rowcount", -1))
+    return None
+
+
+def _execute_step_dbapi(
+    conn: Any,
+    name: str,
+    sql: str,
+    timeout: int,
+    consume: Optional[RowConsumer] = None,
+) -> Optional[List[Any]]:
+    """Run a step on a DB-API connection under ``SET LOCK_TIMEOUT``.
+
+    The cursor is only closed afterwards: pyodbc's cursor context manager
+    commits on exit, which would end the caller's transaction early.
+    """
+    with closing(conn.cursor()) as cursor:
+        _set_lock_timeout(conn, cursor, timeout)
+        cursor.execute(sql)
+        # ``description`` is None for DDL/DML, so skip the fetch
+        if cursor.description is not None:
+            return _fetch_rows(name, cursor, consume)
+        _log_rowcount(name, getattr(cursor, "rowcount", -1))
+        return None
+
+
+class _StepSkipped:
+    """Type of :data:`STEP_SKIPPED`."""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "STEP_SKIPPED"
+
+
+#: Returned by :func:`run_sql_step` and its wrappers instead of a result when
+#: the step was already applied.  It is falsy, like the ``None`` returned by
+#: a step that produced no rows, but can be told apart with ``is``.
+STEP_SKIPPED = _StepSkipped()
+
+# Rows of a step, ``None`` if it returned no result set or streamed its rows,
+# or :data:`STEP_SKIPPED`
+StepResult = Union[List[Any], None, _StepSkipped]
+
+
+def _step_executor(conn: Any) -> Callable[..., Optional[List[Any]]]:
+    """Return the step executor matching ``conn``'s connection API."""
+    return _execute_step_sqlalchemy if _is_sqlalchemy(conn) else _execute_step_dbapi
+
+
+def run_sql_step(
+    conn: Any,
+    name: str,
+    sql: str,
+    timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
+    consume: Optional[RowConsumer] = None,
+) -> StepResult:
+    """Execute a single SQL step and record it as an applied migration.
+
+    The step and its ``MigrationHistory`` record run in one transaction, so
+    the step is only marked as applied once its work has committed.  Steps
+    already recorded are skipped, logged at info level and return
+    :data:`STEP_SKIPPED`.  If ``consume`` is given, result rows are passed to
+    it in chunks instead of being returned, keeping large result sets out of
+    memory.  Errors from the ``MigrationHistory`` bookkeeping are raised as
+    :class:`SQLExecutionError` like errors from the step itself.
+    """
+    logger.info("Starting step: %s", name)
+    start_time = time.perf_counter()
     try:
-        # SQLAlchemy connection
-        if hasattr(conn, "execute") and not hasattr(conn, "cursor"):
-            result = conn.execute(sqlalchemy.text(sql))
-            try:
-                results = result.fetchall()
-                logger.info(f"{name}: Retrieved {len(results)} rows")
-            except Exception:
-                results = None
-                logger.info(f"{name}: Statement executed (no results to fetch)")
-            elapsed = time.time() - start_time
-            logger.info(f"Completed step: {name} in {elapsed:.2f} seconds")
-            record_success()
-            record_migration(conn, name)
-            return results
-        # DB-API connection
-        else:
-            with conn.cursor() as cursor:
-                cursor.execute(f"SET LOCK_TIMEOUT {timeout * 1000}")
-                cursor.execute(sql)
-                try:
-                    results = cursor.fetchall()
-                    logger.info(f"{name}: Retrieved {len(results)} rows")
-                except Exception:
-                    results = None
-                    logger.info(f"{name}: Statement executed (no results to fetch)")
-            elapsed = time.time() - start_time
-            logger.info(f"Completed step: {name} in {elapsed:.2f} seconds")
-            record_success()
-            record_migration(conn, name)
-            return results
+        applied = _applied_cache(conn)
+        if name in applied:
+            logger.info("Skipping step %s: already applied", name)
+            return STEP_SKIPPED
+        with transaction_scope(conn):
+            results = _step_executor(conn)(conn, name, sql, timeout, consume)
+            _record_applied(conn, name)
+    except _AlreadyApplied:
+        applied.add(name)
+        logger.info("Skipping step %s: applied concurrently", name)
+        return STEP_SKIPPED
     except Exception as e:
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.error(f"Error executing step {name}: {e}. SQL: {sql}")
-        logger.info(f"Step {name} failed after {elapsed:.2f} seconds")
+        logger.info("Step %s failed after %.2f seconds", name, elapsed)
         record_failure()
         raise SQLExecutionError(sql, e, table_name=name)
+    applied.add(name)
+    elapsed = time.perf_counter() - start_time
+    logger.info("Completed step: %s in %.2f seconds", name, elapsed)
+    record_success()
+    return results
+
+
+def run_sql_steps(
+    conn: Any,
+    steps: Sequence[Tuple[str, str]],
+    timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
+) -> List[str]:
+    """Execute several ``(name, sql)`` steps in one transaction.
+
+    Already-applied steps are filtered out using the cached applied names and
+    the remaining ones are recorded together with one multi-row ``MERGE`` in
+    the same transaction once they have all succeeded.  If any step fails
+    the whole transaction is rolled back and nothing is recorded.  If another
+    worker recorded some of the steps first, the transaction is rolled back
+    and the steps still pending are run again.
+
+    Returns:
+        Names of the steps that were executed.
+    """
+    name, sql = steps[0] if steps else ("", "")
+    start_time = time.perf_counter()
+    try:
+        applied = _applied_cache(conn)
+        pending = [(name, sql) for name, sql in steps if name not in applied]
+        if not pending:
+            logger.info("Skipping steps: all already applied")
+            return []
+
+        executor = _step_executor(conn)
+        names = [step for step, _ in pending]
+        with transaction_scope(conn):
+            for name, sql in pending:
+                logger.info("Starting step: %s", name)
+                executor(conn, name, sql, timeout)
+            recorded = record_migrations(conn, names, commit=False)
+            if len(recorded) != len(names):
+                raise _AlreadyApplied(name)
+    except _AlreadyApplied:
+        applied.update(set(names) - recorded)
+        logger.info("Some steps were applied concurrently; running the rest again")
+        return run_sql_steps(conn, steps, timeout)
+    except Exception as e:
+        elapsed = time.perf_counter() - start_time
+        logger.error(f"Error executing step {name}: {e}. SQL: {sql}")
+        logger.info("Steps rolled back after %.2f seconds", elapsed)
+        record_failure()
+        raise SQLExecutionError(sql, e, table_name=name)
+
+    applied.update(names)
+    for _ in names:
+        record_success()
+    elapsed = time.perf_counter() - start_time
+    logger.info("Completed %s steps in %.2f seconds", len(names), elapsed)
+    return names
+
+
+def run_sql_step_pooled(
+    name: str, sql: str, timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT
+) -> StepResult:
+    """Run :func:`run_sql_step` on a connection checked out of the target pool.
+
+    Unlike the other helpers no shared ``conn`` is needed, so independent
+    steps can run concurrently from worker threads.
+    """
+    with get_target_connection() as conn:
+        return run_sql_step(conn, name, sql, timeout)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Return ``True`` if ``error`` is worth retrying.
+
+    pyodbc errors carry ``(sqlstate, message)`` in ``args``.  A transient
+    SQLSTATE answers directly; for any other SQLSTATE the native error number
+    in the message is checked, since errors such as lock timeouts (1222)
+    arrive under the generic ``HY000``.  The message is only searched for
+    tokens when the SQLSTATE is missing.
+    """
+    args = getattr(error, "args", ())
+    if len(args) > 1 and isinstance(args[0], str) and len(args[0]) == 5:
+        if args[0] in _TRANSIENT_SQLSTATES:
+            return True
+        native = _NATIVE_ERROR_RE.search(str(args[1]))
+        return native is not None and native.group(1) in _TRANSIENT_NATIVE_ERRORS
+    err_str = str(error).lower()
+    return any(tok in err_str for tok in _TRANSIENT_TOKENS)
+
+
+async def run_sql_step_async(
+    name: str, sql: str, timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT
+) -> StepResult:
+    """Awaitable :func:`run_sql_step_pooled` for running independent steps concurrently.
+
+    Each call runs in a worker thread on its own pooled connection, so
+    ``asyncio.gather`` over several steps overlaps them up to the pool size.
+    """
+    return await asyncio.to_thread(run_sql_step_pooled, name, sql, timeout)
 
 
 def run_sql_step_with_retry(
@@ -187,116 +633,316 @@ def run_sql_step_with_retry(
     sql: str,
     timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
     max_retries: int = ETLConstants.MAX_RETRY_ATTEMPTS,
-) -> Optional[List[Any]]:
+) -> StepResult:
     """Execute a SQL step with retry logic for transient ``pyodbc.Error`` failures.
 
-    Timeout and deadlock errors trigger exponential backoff retries.
+    Timeouts, deadlocks and dropped connections are retried with jittered
+    exponential backoff capped at :data:`_RETRY_BACKOFF_CAP` seconds; any
+    other error is raised immediately.  The step always runs at least once.
     """
 
-    for attempt in range(max_retries):
+    attempts = max(1, max_retries)
+    for attempt in range(attempts):
         try:
             return run_sql_step(conn, name, sql, timeout)
         except SQLExecutionError as exc:
-            import pyodbc  # Imported lazily for tests that stub this module
-
-            if not isinstance(exc.original_error, pyodbc.Error):
+            if _PYODBC_ERROR is None or not isinstance(exc.original_error, _PYODBC_ERROR):
                 raise
 
-            if attempt == max_retries - 1:
+            if attempt == attempts - 1 or not _is_transient(exc.original_error):
                 raise
 
-            err_str = str(exc.original_error).lower()
-            if "timeout" in err_str:
-                logger.warning(
-                    f"Timeout on attempt {attempt + 1} for {name}, retrying..."
-                )
-            elif "deadlock" in err_str:
-                logger.warning(
-                    f"Deadlock on attempt {attempt + 1} for {name}, retrying..."
-                )
+            logger.warning(
+                f"Transient error on attempt {attempt + 1} for {name}, retrying: {exc.original_error}"
+            )
+            time.sleep(min(_RETRY_BACKOFF_CAP, (2**attempt) * random.uniform(0.5, 1.5)))
 
-            time.sleep(2**attempt)
+
+# Scripts that open or close transactions themselves
+_EXPLICIT_TXN_RE = re.compile(r"\b(?:BEGIN\s+TRAN(?:SACTION)?|COMMIT|ROLLBACK)\b", re.I)
+
+# String literals, quoted identifiers and comments
+_LITERAL_OR_COMMENT = r"'(?:[^']|'')*'|\[[^\]]*\]|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/"
+_LITERAL_OR_COMMENT_RE = re.compile(_LITERAL_OR_COMMENT, re.S)
+
+# Literals and comments as above, ``GO`` batch separators (on a line of their
+# own, any case, LF or CRLF) and statement terminators.  Matching the
+# literals and comments first lets ``;`` and ``GO`` inside them pass through
+# untouched.
+_STMT_SPLIT_RE = re.compile(
+    _LITERAL_OR_COMMENT + r"|(?P<go>(?im:^[ \t]*GO[ \t]*(?:\r?\n|$)))|;",
+    re.S,
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _has_explicit_transaction(sql: str) -> bool:
+    """Return ``True`` if ``sql`` manages transactions itself.
+
+    Literals and comments are blanked out first, so ``-- commit later`` or
+    ``'ROLLBACK'`` do not count.
+    """
+    return _EXPLICIT_TXN_RE.search(_LITERAL_OR_COMMENT_RE.sub(" ", sql)) is not None
+
+
+@functools.lru_cache(maxsize=128)
+def _split_batches(sql: str) -> Tuple[Tuple[str, ...], ...]:
+    """Split a script into ``GO`` batches of ``;``-separated statements.
+
+    The script is scanned once; blank and comment-only fragments and batches
+    are dropped.
+    """
+    batches = []
+    statements: List[str] = []
+    start = pos = 0
+    has_code = False
+    for match in _STMT_SPLIT_RE.finditer(sql):
+        token = match.group()
+        is_go = match.group("go") is not None
+        if not is_go and not token.startswith(("--", "/*")) and token != ";":
+            has_code = True
+        elif sql[pos : match.start()].strip():
+            has_code = True
+        pos = match.end()
+        if is_go or token == ";":
+            if has_code:
+                statements.append(sql[start : match.start()].strip())
+            start, has_code = pos, False
+        if is_go and statements:
+            batches.append(tuple(statements))
+            statements = []
+    if has_code or sql[pos:].strip():
+        statements.append(sql[start:].strip())
+    if statements:
+        batches.append(tuple(statements))
+    return tuple(batches)
+
+
+def _statement_chunks(
+    statements: Sequence[str], size: int = ETLConstants.STATEMENT_BATCH_SIZE
+) -> Iterator[Sequence[str]]:
+    """Yield ``statements`` in lists of at most ``size`` items."""
+    for start in range(0, len(statements), size):
+        yield statements[start : start + size]
+
+
+def _script_chunks(sql: str) -> List[Sequence[str]]:
+    """Split ``sql`` on ``GO`` and ``;`` into round-trip sized statement chunks."""
+    return [chunk for batch in _split_batches(sql) for chunk in _statement_chunks(batch)]
+
+
+# Statements that must start their own batch (CREATE VIEW/PROCEDURE/...) or
+# change schema that later statements in the same batch are compiled against.
+# Matches inside comments or literals only cost extra round trips.
+_DDL_RE = re.compile(r"\b(?:CREATE|ALTER|DROP)\b", re.I)
+
+
+def _execution_units(chunk: Sequence[str]) -> List[str]:
+    """Return the SQL strings to send for ``chunk``.
+
+    The statements are joined into one round trip unless any of them is DDL,
+    in which case each one is sent on its own.
+    """
+    if len(chunk) > 1 and not any(_DDL_RE.search(stmt) for stmt in chunk):
+        return [";\n".join(chunk)]
+    return list(chunk)
+
+
+def _execute_batch(cursor: Any, sql: str) -> None:
+    """Execute ``sql`` on a DB-API cursor and drain every result set.
+
+    pyodbc only raises an error from the second or a later statement of a
+    batch once that statement's result set is reached, so all of them are
+    consumed before the batch counts as successful.
+    """
+    cursor.execute(sql)
+    nextset = getattr(cursor, "nextset", None)
+    if nextset is not None:
+        while nextset():
+            pass
+
+
+def _replay_statements(
+    conn: Any,
+    name: str,
+    statements: Sequence[str],
+    execute: Callable[[str], Any],
+    error: Exception,
+) -> None:
+    """Find which of the joined ``statements`` made their round trip fail.
+
+    The failed transaction has already been rolled back.  The statements are
+    replayed one at a time in a transaction that is always rolled back, and
+    :class:`SQLExecutionError` is raised for the first one that fails, or for
+    the whole batch with the original ``error`` if none fails on its own.
+    """
+    logger.warning(f"Batch in script {name} failed; retrying statement by statement")
+    with transaction_scope(conn):
+        for stmt in statements:
+            try:
+                execute(stmt)
+            except Exception as e:
+                logger.error(f"Error executing script {name}: {e}. SQL: {stmt}")
+                raise SQLExecutionError(stmt, e, table_name=name)
+        batch = ";\n".join(statements)
+        logger.error(f"Error executing script {name}: {error}. SQL: {batch}")
+        raise SQLExecutionError(batch, error, table_name=name)
 
 
 def run_sql_script(
-    conn: Any, name: str, sql: str, timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT
+    conn: Any,
+    name: str,
+    sql: str,
+    timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
+    commit_every: int = 0,
 ) -> None:
-    """Execute a multi-statement SQL script.
+    """Execute a multi-statement SQL script and record it as applied.
+
+    On DB-API connections the statements in each ``GO`` batch are sent to the
+    server in round trips of up to :attr:`ETLConstants.STATEMENT_BATCH_SIZE`
+    statements under ``SET NOCOUNT ON``, with every result set drained so
+    errors from any statement are raised.  Batches containing DDL are sent
+    one statement at a time.  The whole script and its ``MigrationHistory``
+    record run in one transaction, which is rolled back if any statement
+    fails.  If the failing round trip combined several statements they are
+    replayed one at a time (and rolled back) to report the one that failed.
+    Scripts containing their own ``BEGIN TRAN``/``COMMIT`` are not wrapped;
+    they are committed after each round trip and recorded once they finish.
+    SQLAlchemy connections execute one statement at a time in a single
+    transaction.
 
     Args:
         conn: Database connection
         name: Name of the script for logging
         sql: SQL script containing multiple statements
         timeout: Query timeout in seconds for each statement
+        commit_every: On DB-API connections, commit after this many round
+            trips instead of once at the end (``0`` keeps one transaction).
+            Each committed group is recorded as ``<name>#group-<n>``, so a
+            re-run after a failure (with the same script and
+            ``commit_every``) skips the groups that already committed.
     """
-    logger.info(f"Starting script: {name}")
-    ensure_version_table(conn)
-    if has_migration(conn, name):
-        logger.info(f"Skipping script {name}: already applied")
-        return
-    start_time = time.time()
+    logger.info("Starting script: %s", name)
+    start_time = time.perf_counter()
     try:
+        applied = _applied_cache(conn)
+        if name in applied:
+            logger.info("Skipping script %s: already applied", name)
+            return
         # Split by GO statements as well as semicolons for SQL Server
         # This handles scripts that use GO as a batch separator
-        sql_batches = sql.split("\nGO\n") if "\nGO\n" in sql else [sql]
+        chunks = _script_chunks(sql)
         total_statements = 0
 
-        # SQLAlchemy connection
-        if hasattr(conn, "execute") and not hasattr(conn, "cursor"):
-            for batch in sql_batches:
-                statements = [stmt.strip() for stmt in batch.split(";") if stmt.strip()]
-                for stmt in statements:
-                    # Skip comments and empty statements
-                    if stmt and not stmt.strip().startswith("--"):
+        # SQLAlchemy connection: results cannot be drained reliably through
+        # SQLAlchemy, so statements are not combined
+        if _is_sqlalchemy(conn):
+            with transaction_scope(conn):
+                for chunk in chunks:
+                    for stmt in chunk:
                         try:
                             conn.execute(sqlalchemy.text(stmt))
-                            total_statements += 1
                         except Exception as e:
-                            logger.error(
-                                f"Error executing script {name}: {e}. SQL: {stmt}"
-                            )
+                            logger.error(f"Error executing script {name}: {e}. SQL: {stmt}")
                             raise SQLExecutionError(stmt, e, table_name=name)
+                    total_statements += len(chunk)
+                _record_applied(conn, name)
         # DB-API connection
         else:
-            with conn.cursor() as cursor:
-                # Set the query timeout
-                cursor.execute(
-                    f"SET LOCK_TIMEOUT {timeout * 1000}"
-                )  # Convert to milliseconds
-
-                for batch in sql_batches:
-                    statements = [stmt.strip() for stmt in batch.split(";") if stmt.strip()]
-                    for stmt in statements:
-                        # Skip comments and empty statements
-                        if stmt and not stmt.strip().startswith("--"):
+            with closing(conn.cursor()) as cursor:
+                _set_lock_timeout(conn, cursor, timeout)
+                cursor.execute("SET NOCOUNT ON")
+                try:
+                    if _has_explicit_transaction(sql):
+                        # The script manages its own transactions; wrapping it
+                        # would change their meaning and make a replay unsafe.
+                        for chunk in chunks:
+                            for unit in _execution_units(chunk):
+                                try:
+                                    _execute_batch(cursor, unit)
+                                    conn.commit()
+                                except Exception as e:
+                                    logger.error(f"Error executing script {name}: {e}. SQL: {unit}")
+                                    raise SQLExecutionError(unit, e, table_name=name)
+                            total_statements += len(chunk)
+                        check_and_claim_migration(conn, name)
+                    else:
+                        group_size = commit_every if commit_every > 0 else len(chunks) or 1
+                        groups = [
+                            chunks[start : start + group_size]
+                            for start in range(0, len(chunks), group_size)
+                        ] or [[]]
+                        for index, group in enumerate(groups):
+                            last = index == len(groups) - 1
+                            # Groups before the last are recorded on their own
+                            # so a re-run after a failure skips them
+                            marker = name if last else f"{name}#group-{index + 1}"
+                            if marker in applied:
+                                logger.info(
+                                    "Skipping group %s of script %s: already applied", index + 1, name
+                                )
+                                continue
+                            chunk: Sequence[str] = ()
+                            unit: Optional[str] = None
                             try:
-                                cursor.execute(stmt)
-                                conn.commit()
-                                total_statements += 1
+                                with transaction_scope(conn):
+                                    for chunk in group:
+                                        units = _execution_units(chunk)
+                                        for unit in units:
+                                            _execute_batch(cursor, unit)
+                                    unit = None
+                                    _record_applied(conn, marker)
+                            except _AlreadyApplied:
+                                if last:
+                                    raise
+                                applied.add(marker)
+                                continue
                             except Exception as e:
-                                logger.error(
-                                    f"Error executing script {name}: {e}. SQL: {stmt}"
-                                )
-                                raise SQLExecutionError(stmt, e, table_name=name)
+                                if unit is None:
+                                    raise
+                                if len(units) == 1 and len(chunk) > 1:
+                                    # Only a joined round trip needs replaying
+                                    # to tell which statement failed
+                                    _replay_statements(
+                                        conn,
+                                        name,
+                                        chunk,
+                                        lambda stmt: _execute_batch(cursor, stmt),
+                                        e,
+                                    )
+                                logger.error(f"Error executing script {name}: {e}. SQL: {unit}")
+                                raise SQLExecutionError(unit, e, table_name=name)
+                            applied.add(marker)
+                            total_statements += sum(len(chunk) for chunk in group)
+                finally:
+                    try:
+                        cursor.execute("SET NOCOUNT OFF")
+                    except Exception:  # pragma: no cover - connection already broken
+                        pass
 
-        elapsed = time.time() - start_time
+        applied.add(name)
+        elapsed = time.perf_counter() - start_time
         logger.info(
-            f"Completed script: {name} - executed {total_statements} statements in {elapsed:.2f} seconds"
+            "Completed script: %s - executed %s statements in %.2f seconds",
+            name,
+            total_statements,
+            elapsed,
         )
         record_success()
-        record_migration(conn, name)
+    except _AlreadyApplied:
+        applied.add(name)
+        logger.info("Skipping script %s: applied concurrently", name)
     except SQLExecutionError:
+        record_failure()
         raise
     except Exception as e:
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.error(f"Error in script {name}: {e}")
         logger.info(f"Script {name} failed after {elapsed:.2f} seconds")
         record_failure()
         raise SQLExecutionError(sql, e, table_name=name)
 
 
-import sqlalchemy
-
 def execute_sql_with_timeout(
     conn: Any,
     sql: str,
@@ -304,11 +950,11 @@ def execute_sql_with_timeout(
     timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
 ) -> Any:
     """Execute SQL with parameters and timeout."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     from contextlib import closing
 
     # If this is a SQLAlchemy Connection, use .execute()
-    if hasattr(conn, "execute") and not hasattr(conn, "cursor"):
+    if _is_sqlalchemy(conn):
         try:
             if params:
                 result = conn.execute(sqlalchemy.text(sql), params)
@@ -321,15 +967,15 @@ def execute_sql_with_timeout(
             record_failure()
             raise SQLExecutionError(sql, e)
         finally:
-            elapsed = time.time() - start_time
-            logger.debug(f"SQL executed in {elapsed:.2f} seconds")
+            elapsed = time.perf_counter() - start_time
+            logger.debug("SQL executed in %.2f seconds", elapsed)
     else:
         # Assume DB-API connection
         cursor = conn.cursor()
         with closing(cursor) as cur:
             try:
                 try:
-                    cur.execute(f"SET LOCK_TIMEOUT {timeout * 1000}")
+                    _set_lock_timeout(conn, cur, timeout)
                 except Exception:
                     pass
 
@@ -345,5 +991,53 @@ def execute_sql_with_timeout(
                 record_failure()
                 raise SQLExecutionError(sql, e)
             finally:
-                elapsed = time.time() - start_time
-                logger.debug(f"SQL executed in {elapsed:.2f} seconds")
+                elapsed = time.perf_counter() - start_time
+                logger.debug("SQL executed in %.2f seconds", elapsed)
+
+
+def execute_prepared(
+    conn: Any,
+    sql: str,
+    params_iter: Iterable[Any],
+    batch_size: int = ETLConstants.STATEMENT_BATCH_SIZE,
+    timeout: int = ETLConstants.DEFAULT_SQL_TIMEOUT,
+) -> int:
+    """Execute one parameterized statement for many parameter sets.
+
+    Parameter sets are sent ``batch_size`` at a time with ``executemany``;
+    pyodbc cursors get ``fast_executemany`` so each batch is a single round
+    trip, and ``timeout`` is applied as the session lock timeout.
+    SQLAlchemy connections expect mappings, DB-API connections sequences.
+    Committing is left to the caller.
+
+    Returns:
+        The number of parameter sets executed.
+    """
+    start_time = time.perf_counter()
+    total = 0
+    params_iter = iter(params_iter)
+    try:
+        # SQLAlchemy connection
+        if _is_sqlalchemy(conn):
+            stmt = sqlalchemy.text(sql)
+            while chunk := list(itertools.islice(params_iter, batch_size)):
+                conn.execute(stmt, chunk)
+                total += len(chunk)
+        # DB-API connection
+        else:
+            with closing(conn.cursor()) as cursor:
+                _set_lock_timeout(conn, cursor, timeout)
+                if hasattr(cursor, "fast_executemany"):
+                    cursor.fast_executemany = True
+                while chunk := list(itertools.islice(params_iter, batch_size)):
+                    cursor.executemany(sql, chunk)
+                    total += len(chunk)
+        record_success()
+        return total
+    except Exception as e:
+        logger.error(f"Error executing SQL: {e}. SQL: {sql}")
+        record_failure()
+        raise SQLExecutionError(sql, e)
+    finally:
+        elapsed = time.perf_counter() - start_time
+        logger.debug("Executed %s parameter sets in %.2f seconds", total, elapsed)
@@ -1,9 +1,13 @@
 """Logging utilities with correlation IDs and success/failure counters."""
 
+import atexit
 import logging
 import os
+import queue
+import threading
 import uuid
 from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 try:
@@ -31,6 +35,10 @@ class CorrelationIdFilter(logging.Filter):
 
 operation_counts = {"success": 0, "failure": 0}
 
+# ``+=`` on a dict item is not atomic, so concurrent workers would lose
+# increments without this
+_counts_lock = threading.Lock()
+
 # Prometheus counters mirroring ``operation_counts``
 success_counter = Counter(
     "etl_success_total",
@@ -43,21 +51,45 @@ failure_counter = Counter(
 
 
 def record_success() -> None:
-    operation_counts["success"] += 1
+    with _counts_lock:
+        operation_counts["success"] += 1
     success_counter.inc()
 
 
 def record_failure() -> None:
-    operation_counts["failure"] += 1
+    with _counts_lock:
+        operation_counts["failure"] += 1
     failure_counter.inc()
 
 
+# Background thread writing records queued by the root ``QueueHandler``
+_log_listener: Optional[QueueListener] = None
+
+
+def stop_logging() -> None:
+    """Stop the background log writer, flushing any queued records."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+atexit.register(stop_logging)
+
+
 def setup_logging(level: int = logging.INFO) -> str:
     """Configure root logging and generate a correlation ID.
 
+    The root logger only gets a :class:`~logging.handlers.QueueHandler`; a
+    background :class:`~logging.handlers.QueueListener` owns the stream
+    handler, so formatting and console I/O stay off the calling thread.
+
     Returns the generated correlation ID so callers can include it elsewhere if
     needed.
     """
+    global _log_listener
     cid = uuid.uuid4().hex
     correlation_id_var.set(cid)
 
@@ -70,7 +102,10 @@ def setup_logging(level: int = logging.INFO) -> str:
             "%(asctime)s [%(correlation_id)s] %(levelname)s %(name)s: %(message)s"
         )
         handler.setFormatter(formatter)
-        root.addHandler(handler)
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _log_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _log_listener.start()
+        root.addHandler(QueueHandler(log_queue))
 
     root.addFilter(CorrelationIdFilter())
 
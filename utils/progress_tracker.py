@@ -1,26 +1,48 @@
 import json
 import logging
 import os
-from typing import Any
+from typing import Any, Optional
+
+try:  # pragma: no cover - optional speedup
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:  # pragma: no cover - stdlib fallback
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
 logger = logging.getLogger(__name__)
 
 class ProgressTracker:
-    """Helper to manage ETL progress files."""
+    """Helper to manage ETL progress files.
+
+    Progress is kept in memory after the first read.  Updates are written
+    back every ``flush_every`` calls (every call by default) by replacing the
+    file atomically, so readers never see a half-written file.
+    """
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, flush_every: int = 1) -> None:
         self.path = path
+        self.flush_every = max(1, flush_every)
+        self._data: Optional[dict[str, Any]] = None
+        self._dirty = 0
 
     def load(self) -> dict[str, Any]:
         """Return contents of the progress file or an empty dict."""
+        if self._data is not None:
+            return self._data
+        self._data = {}
         if not self.path or not os.path.exists(self.path):
-            return {}
+            return self._data
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(self.path, "rb") as f:
+                self._data = _loads(f.read())
         except Exception as exc:  # pragma: no cover - unexpected
             logger.error("Failed to read progress file %s: %s", self.path, exc)
-            return {}
+        return self._data
 
     def get(self, key: str, default: int = 0) -> int:
         """Get a numeric progress value for ``key``."""
@@ -34,17 +56,29 @@ class ProgressTracker:
         """Update the progress ``key`` with ``value``."""
         if not self.path:
             return
-        data = self.load()
-        data[key] = value
+        self.load()[key] = value
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending updates to the progress file."""
+        if not self.path or not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
         try:
-            os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(data, f)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(_dumps(self._data))
+            os.replace(tmp_path, self.path)
+            self._dirty = 0
         except Exception as exc:  # pragma: no cover - unlikely
             logger.error("Failed to write progress file %s: %s", self.path, exc)
 
     def delete(self) -> None:
         """Delete the progress file if it exists."""
+        self._data = {}
+        self._dirty = 0
         if self.path and os.path.exists(self.path):
             try:
                 os.remove(self.path)
@@ -5,8 +5,15 @@ from typing import Optional, List
 
 logger = logging.getLogger(__name__)
 
-_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
-_DANGEROUS = {"DROP", "DELETE", "TRUNCATE", "ALTER", "EXEC", "EXECUTE"}
+# Keep entries upper case: matches are reported via ``match.group().upper()``
+_DANGEROUS = frozenset({"DROP", "DELETE", "TRUNCATE", "ALTER", "EXEC", "EXECUTE"})
+# All of ``_DANGEROUS`` in one case-insensitive alternation so a statement is
+# scanned once.  Keywords only match as whole words, so identifiers such as
+# ``DROPPED_ROWS`` are not flagged.
+_DANGEROUS_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(kw) for kw in sorted(_DANGEROUS)) + r")\b",
+    re.IGNORECASE,
+)
 
 
 @dataclass
@@ -19,7 +26,8 @@ class ValidationResult:
 
 def validate_sql_identifier(identifier: str) -> str:
     """Return ``identifier`` if it matches a basic SQL identifier pattern."""
-    if not isinstance(identifier, str) or not _IDENTIFIER_RE.match(identifier):
+    # ASCII ``isidentifier`` is exactly ``[A-Za-z_][A-Za-z0-9_]*``
+    if not (isinstance(identifier, str) and identifier.isascii() and identifier.isidentifier()):
         raise ValueError(f"Invalid SQL identifier '{identifier}'")
     return identifier
 
@@ -38,10 +46,10 @@ def validate_sql_statement(sql: str, allow_ddl: bool = False) -> str:
     """Perform a few basic checks to guard against obvious SQL injection."""
     if not sql or not sql.strip():
         raise ValueError("SQL statement cannot be empty")
-    check_sql = sql.upper()
-    for kw in _DANGEROUS:
-        if kw in check_sql and not allow_ddl:
-            raise ValueError(f"Dangerous keyword detected: {kw}")
+    if not allow_ddl:
+        match = _DANGEROUS_RE.search(sql)
+        if match:
+            raise ValueError(f"Dangerous keyword detected: {match.group().upper()}")
     if ';' in sql and sql.strip().count(';') > 1:
         raise ValueError("Multiple statements are not allowed")
     return sql